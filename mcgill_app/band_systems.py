@@ -0,0 +1,287 @@
+"""
+.. module:: band_systems
+    :synopsis: Registry of photometric band systems, and evaluation of magnitudes in all bands of a system at once.
+
+.. moduleauthor:: Jack Romo <sharrackor@gmail.com>
+
+"""
+
+from __future__ import division
+import math
+import numpy as np
+import constants
+
+# Above this value of hc / (l * k * T), log10(e^x - 1) equals x * log10(e) to double precision.
+_LARGE_EXPONENT = 50.0
+_LOG10_E = math.log10(math.e)
+# Zero point fluxes are calibrated for a star of solar radius at 10 parsecs; other stars are diluted relative to it.
+_REFERENCE_RATIO = constants.SOLAR_RADIUS / (10 * constants.PARSEC)
+
+
+class BandSystem(object):
+    """
+    A photometric system, made up of named wave bands each with an effective wavelength and a zero point flux.
+    Bands are identified by their index within the system, so that magnitudes of all bands are computed together.
+    """
+
+    def __init__(self, name, band_names, wavelengths, zero_point_fluxes):
+        """
+        :type name: str
+        :param name: Name the system is registered under.
+        :type band_names: list
+        :param band_names: Name of each wave band, eg. "u".
+        :type wavelengths: list
+        :param wavelengths: Effective wavelength of each wave band (m).
+        :type zero_point_fluxes: list
+        :param zero_point_fluxes: Flux in each wave band of reference star with zero magnitude (ie. Vega).
+        :raises: ValueError
+        """
+        if not len(band_names) == len(wavelengths) == len(zero_point_fluxes):
+            raise ValueError("Every wave band needs one wavelength and one zero point flux")
+        self.name = name
+        self.band_names = tuple(band_names)
+        self.wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        self.zero_point_fluxes = np.asarray(zero_point_fluxes, dtype=np.float64)
+        self.band_indices = dict((band, i) for i, band in enumerate(self.band_names))
+        # Magnitude of band b at temperature T is offsets[b] + 2.5 * log10(e^(exponent_factors[b] / T) - 1).
+        prefactors = (2 * constants.PLANCK_CONST * (constants.LIGHT_SPEED ** 2)) / (self.wavelengths ** 5)
+        self.offsets = -2.5 * np.log10(prefactors / self.zero_point_fluxes)
+        self.exponent_factors = ((constants.PLANCK_CONST * constants.LIGHT_SPEED) /
+                                 (self.wavelengths * constants.BOLTZMANN_CONST))
+        # Python floats for scalar evaluation, which is several times slower with NumPy scalars.
+        self._scalar_offsets = tuple(float(offset) for offset in self.offsets)
+        self._scalar_exponent_factors = tuple(float(factor) for factor in self.exponent_factors)
+
+    def __len__(self):
+        return len(self.band_names)
+
+    def index(self, band):
+        """
+        :type band: str
+        :param band: Name of wave band within system.
+        :rtype: int
+        :returns: Index of wave band within system.
+        :raises: ValueError
+        """
+        try:
+            return self.band_indices[band]
+        except KeyError:
+            raise ValueError("Could not identify wave band {0} in band system {1}".format(band, self.name))
+
+    def magnitude(self, temperature, band_index, radius=constants.SOLAR_RADIUS, distance=10 * constants.PARSEC):
+        """
+        Gets magnitude of a black body in a single wave band.
+
+        :type temperature: int, float
+        :param temperature: Temperature of black body (K).
+        :type band_index: int
+        :param band_index: Index of wave band within system.
+        :type radius: int, float
+        :param radius: Radius of black body (m).
+        :type distance: int, float
+        :param distance: Distance of black body from observer (m).
+        :rtype: float
+        :returns: Magnitude within wave band.
+        """
+        offset, exponent_factor = self.get_magnitude_constants(band_index, radius, distance)
+        return scalar_magnitude(temperature, offset, exponent_factor)
+
+    def get_magnitude_constants(self, band_index, radius=constants.SOLAR_RADIUS, distance=10 * constants.PARSEC):
+        """
+        Gets the constants that, with temperature, determine the magnitude of a black body in a single wave band.
+        Callers evaluating the magnitude of one body at many temperatures compute these once,
+        then call scalar_magnitude.
+
+        :type band_index: int
+        :param band_index: Index of wave band within system.
+        :type radius: int, float
+        :param radius: Radius of black body (m).
+        :type distance: int, float
+        :param distance: Distance of black body from observer (m).
+        :rtype: tuple
+        :returns: A 2-tuple of magnitude offset and exponent factor hc / (l * k), as floats.
+        """
+        dilution = -5 * math.log10(radius / (_REFERENCE_RATIO * distance))
+        return self._scalar_offsets[band_index] + dilution, self._scalar_exponent_factors[band_index]
+
+    def magnitudes(self, temperatures, radii=constants.SOLAR_RADIUS, distances=10 * constants.PARSEC,
+                   band_indices=None):
+        """
+        Gets magnitudes of black bodies in every wave band of system in one pass.
+        The reciprocal of each temperature and the dilution of flux with distance are computed once and shared
+        between all bands.
+
+        :type temperatures: int, float, numpy.ndarray
+        :param temperatures: Temperature or array of temperatures of black bodies (K).
+        :type radii: int, float, numpy.ndarray
+        :param radii: Radius or array of radii of black bodies (m), broadcastable against temperatures.
+        :type distances: int, float, numpy.ndarray
+        :param distances: Distance or array of distances of black bodies from observer (m), broadcastable against
+            temperatures.
+        :type band_indices: list
+        :param band_indices: Indices of wave bands to evaluate. All bands are evaluated if not given.
+        :rtype: numpy.ndarray
+        :returns: Array of shape temperatures.shape + (number of bands,) of magnitudes.
+        """
+        offsets, exponent_factors = self.offsets, self.exponent_factors
+        if band_indices is not None:
+            offsets, exponent_factors = offsets[band_indices], exponent_factors[band_indices]
+        inverse_temps = 1.0 / np.asarray(temperatures, dtype=np.float64)
+        x = inverse_temps[..., np.newaxis] * exponent_factors
+        return offsets + 2.5 * _log_terms(x) + _dilutions(radii, distances)[..., np.newaxis]
+
+    def magnitudes_in_bands(self, temperatures, band_indices, radii=constants.SOLAR_RADIUS,
+                            distances=10 * constants.PARSEC):
+        """
+        Gets magnitudes of black bodies each in its own wave band, eg. the observations making up a light curve.
+
+        :type temperatures: int, float, numpy.ndarray
+        :param temperatures: Temperature or array of temperatures of black bodies (K).
+        :type band_indices: int, numpy.ndarray
+        :param band_indices: Index of wave band of each black body, broadcastable against temperatures.
+        :type radii: int, float, numpy.ndarray
+        :param radii: Radius or array of radii of black bodies (m), broadcastable against temperatures.
+        :type distances: int, float, numpy.ndarray
+        :param distances: Distance or array of distances of black bodies from observer (m), broadcastable against
+            temperatures.
+        :rtype: numpy.ndarray
+        :returns: Array of magnitudes, of the broadcast shape of all arguments.
+        """
+        band_indices = np.asarray(band_indices, dtype=np.intp)
+        x = self.exponent_factors[band_indices] / np.asarray(temperatures, dtype=np.float64)
+        return self.offsets[band_indices] + 2.5 * _log_terms(x) + _dilutions(radii, distances)
+
+
+def scalar_magnitude(temperature, offset, exponent_factor):
+    """
+    Magnitude of a black body at one temperature, from constants given by BandSystem.get_magnitude_constants.
+    Uses only Python float arithmetic, for callers that must evaluate one temperature at a time.
+
+    :type temperature: int, float
+    :param temperature: Temperature of black body (K).
+    :type offset: float
+    :param offset: Magnitude offset of wave band, radius and distance.
+    :type exponent_factor: float
+    :param exponent_factor: hc / (l * k) of wave band.
+    :rtype: float
+    :returns: Magnitude within wave band.
+    """
+    x = exponent_factor / temperature
+    if x > _LARGE_EXPONENT:
+        return offset + 2.5 * _LOG10_E * x
+    return offset + 2.5 * math.log10(math.expm1(x))
+
+
+def _log_terms(x):
+    """
+    :type x: numpy.ndarray
+    :param x: Values of hc / (l * k * T).
+    :rtype: numpy.ndarray
+    :returns: log10(e^x - 1), without overflow for large x.
+    """
+    with np.errstate(over="ignore"):
+        return np.where(x > _LARGE_EXPONENT, x * _LOG10_E,
+                        np.log10(np.expm1(np.minimum(x, _LARGE_EXPONENT))))
+
+
+def _dilutions(radii, distances):
+    """
+    :returns: Array of magnitudes added to those of the reference star by differences in radius and distance.
+    """
+    return np.asarray(-5 * np.log10(np.asarray(radii, dtype=np.float64) /
+                                    (_REFERENCE_RATIO * np.asarray(distances, dtype=np.float64))))
+
+
+_band_systems = {}
+
+
+def register_band_system(system):
+    """
+    Make a band system available by name to Star, PlottedMagnitudeFunction and get_band_system.
+    Replaces any system already registered under the same name.
+
+    :type system: BandSystem
+    :param system: The band system to register.
+    :returns: Nothing.
+    """
+    _band_systems[system.name] = system
+
+
+def get_band_system(name):
+    """
+    :type name: str, BandSystem
+    :param name: Name of a registered band system. A BandSystem is returned unchanged.
+    :rtype: BandSystem
+    :returns: Band system registered under name.
+    :raises: ValueError
+    """
+    if isinstance(name, BandSystem):
+        return name
+    try:
+        return _band_systems[name]
+    except KeyError:
+        raise ValueError("Could not identify band system {0}".format(name))
+
+
+def band_system_names():
+    """
+    :rtype: list
+    :returns: Sorted names of all registered band systems.
+    """
+    return sorted(_band_systems)
+
+
+def vega_zero_point_fluxes(wavelengths):
+    """
+    Estimates zero point fluxes at wavelengths not covered by the UBVR constants.
+    Vega is modelled as a black body of constants.VEGA_TEMPERATURE, scaled to best match the UBVR zero points
+    (to within 0.05 magnitudes in each band).
+
+    :type wavelengths: list
+    :param wavelengths: Effective wavelengths of wave bands (m).
+    :rtype: numpy.ndarray
+    :returns: Zero point flux of each wavelength.
+    """
+    ubvr = BandSystem("ubvr", ["u", "b", "v", "r"],
+                      [constants.U_WAVELENGTH, constants.B_WAVELENGTH, constants.V_WAVELENGTH, constants.R_WAVELENGTH],
+                      [constants.VEGA_U_FLUX, constants.VEGA_B_FLUX, constants.VEGA_V_FLUX, constants.VEGA_R_FLUX])
+    # Vega has magnitude zero by definition, so any residual magnitude of the model is the scale error.
+    scale = 10 ** (np.mean(ubvr.magnitudes(constants.VEGA_TEMPERATURE)) / 2.5)
+    model = BandSystem("vega", [str(i) for i in range(len(wavelengths))], wavelengths, np.ones(len(wavelengths)))
+    return scale * 10 ** (model.magnitudes(constants.VEGA_TEMPERATURE) / -2.5)
+
+
+def ab_zero_point_fluxes(wavelengths):
+    """
+    Zero point fluxes of the AB magnitude system, in which a source of flat flux density per unit frequency
+    constants.AB_ZERO_POINT_FLUX_DENSITY has magnitude zero in every band.
+    Flux density observed from the reference star of solar radius at 10 parsecs is pi * (its surface flux) * (its
+    radius / its distance)^2, so that scaling converts the observed AB flux density to the units of other zero points.
+
+    :type wavelengths: list
+    :param wavelengths: Effective wavelengths of wave bands (m).
+    :rtype: numpy.ndarray
+    :returns: Zero point flux of each wavelength.
+    """
+    observed = constants.AB_ZERO_POINT_FLUX_DENSITY * constants.LIGHT_SPEED / np.asarray(wavelengths) ** 2
+    return observed / (math.pi * _REFERENCE_RATIO ** 2)
+
+
+DEFAULT_BAND_SYSTEM = "johnson_cousins"
+"""Name of band system used when none is specified."""
+
+register_band_system(BandSystem(
+    "johnson_cousins", ["u", "b", "v", "r", "i"],
+    [constants.U_WAVELENGTH, constants.B_WAVELENGTH, constants.V_WAVELENGTH, constants.R_WAVELENGTH,
+     constants.I_WAVELENGTH],
+    [constants.VEGA_U_FLUX, constants.VEGA_B_FLUX, constants.VEGA_V_FLUX, constants.VEGA_R_FLUX,
+     vega_zero_point_fluxes([constants.I_WAVELENGTH])[0]]))
+
+# SDSS ugriz magnitudes are defined on the AB system, unlike the Vega calibrated Johnson-Cousins and 2MASS systems.
+_SDSS_WAVELENGTHS = [0.3551e-6, 0.4686e-6, 0.6166e-6, 0.7480e-6, 0.8932e-6]
+register_band_system(BandSystem("sdss", ["u", "g", "r", "i", "z"], _SDSS_WAVELENGTHS,
+                                ab_zero_point_fluxes(_SDSS_WAVELENGTHS)))
+
+_TWO_MASS_WAVELENGTHS = [1.235e-6, 1.662e-6, 2.159e-6]
+register_band_system(BandSystem("2mass", ["j", "h", "ks"], _TWO_MASS_WAVELENGTHS,
+                                vega_zero_point_fluxes(_TWO_MASS_WAVELENGTHS)))
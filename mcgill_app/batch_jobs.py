@@ -0,0 +1,367 @@
+"""
+.. module:: batch_jobs
+    :synopsis: Sharded, checkpointed computation of catalogue magnitudes by many workers on many nodes.
+
+.. moduleauthor:: Jack Romo <sharrackor@gmail.com>
+
+A job lives in a directory visible to every worker, eg. on a shared file system. Its shards move between
+subdirectories by renaming files, which is atomic, so workers need no other means of coordination:
+
+* queue: a file named <shard>.<attempt> for each shard waiting to be computed.
+* running: a file named <shard>.<attempt>.<worker> for each shard being computed. Its worker touches it after each
+  chunk, so that claims of workers which have died can be found and retried.
+* done: a file named <shard> for each shard whose output is complete. Completed shards are never recomputed,
+  so a job which is stopped may be resumed by starting workers again.
+* failed: a file named <shard>.<attempt> for each shard which failed max_attempts times.
+* outputs: a binary columnar catalogue of magnitudes for each completed shard.
+* errors: the traceback of each failed attempt.
+"""
+
+from __future__ import division
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import tempfile
+import time
+import traceback
+import band_systems
+import catalogue
+
+JOB_FILE_NAME = "job.json"
+"""Name of file within job directory describing job."""
+
+_QUEUE, _RUNNING, _DONE, _FAILED, _OUTPUTS, _ERRORS = "queue", "running", "done", "failed", "outputs", "errors"
+
+
+def _shard_name(index):
+    return "{0:06d}".format(index)
+
+
+def create_job(job_directory, input_path, band_system=band_systems.DEFAULT_BAND_SYSTEM, bands=None,
+               shard_size=10**6, chunk_size=2**18, max_attempts=3):
+    """
+    Creates a job computing magnitudes of every star of a catalogue, split into shards queued for workers.
+
+    :type job_directory: str
+    :param job_directory: Directory to create job in. Must not already hold a job.
+    :type input_path: str
+    :param input_path: Path of catalogue with radius, distance and temperature columns, as seen by every worker.
+    :type band_system: str, BandSystem
+    :param band_system: Band system to get magnitudes within. Must be registered under its name on every worker.
+    :type bands: list
+    :param bands: Names of wave bands to compute. All bands of the system are computed if not given.
+    :type shard_size: int
+    :param shard_size: Number of stars in each shard. Approximate for CSV catalogues.
+    :type chunk_size: int
+    :param chunk_size: Number of stars a worker processes at once. Bounds memory use of workers.
+    :type max_attempts: int
+    :param max_attempts: Number of times a shard is attempted before it is left failed.
+    :rtype: int
+    :returns: Number of shards.
+    :raises: ValueError
+    """
+    system = band_systems.get_band_system(band_system)
+    if bands is None:
+        bands = system.band_names
+    for band in bands:
+        system.index(band)
+    if os.path.exists(os.path.join(job_directory, JOB_FILE_NAME)):
+        raise ValueError("Directory {0} already holds a job".format(job_directory))
+    shards = catalogue.split_catalogue(input_path, shard_size)
+    for subdirectory in [_QUEUE, _RUNNING, _DONE, _FAILED, _OUTPUTS, _ERRORS]:
+        path = os.path.join(job_directory, subdirectory)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+    for index in range(len(shards)):
+        open(os.path.join(job_directory, _QUEUE, _shard_name(index) + ".0"), "w").close()
+    job = {"input_path": os.path.abspath(input_path), "band_system": system.name, "bands": list(bands),
+           "shards": [list(shard) for shard in shards], "chunk_size": chunk_size, "max_attempts": max_attempts}
+    # Job file is written last, so that workers never see a partly created job.
+    temp_path = os.path.join(job_directory, JOB_FILE_NAME + ".tmp")
+    with open(temp_path, "w") as job_file:
+        json.dump(job, job_file, indent=1)
+    os.rename(temp_path, os.path.join(job_directory, JOB_FILE_NAME))
+    return len(shards)
+
+
+def load_job(job_directory):
+    """
+    :type job_directory: str
+    :param job_directory: Directory of job.
+    :rtype: dict
+    :returns: Description of job, as written by create_job.
+    :raises: ValueError
+    """
+    try:
+        with open(os.path.join(job_directory, JOB_FILE_NAME)) as job_file:
+            return json.load(job_file)
+    except (IOError, OSError):
+        raise ValueError("Could not identify a job in directory {0}".format(job_directory))
+
+
+def get_job_status(job_directory):
+    """
+    :type job_directory: str
+    :param job_directory: Directory of job.
+    :rtype: dict
+    :returns: Number of shards queued, running, done and failed, keyed by those names.
+    """
+    return dict((state, len(os.listdir(os.path.join(job_directory, state))))
+                for state in [_QUEUE, _RUNNING, _DONE, _FAILED])
+
+
+def _move(job_directory, source, destination):
+    """
+    Atomically moves a shard file between subdirectories of a job.
+
+    :type source: tuple
+    :param source: A 2-tuple of subdirectory and name of file to move.
+    :type destination: tuple
+    :param destination: A 2-tuple of subdirectory and new name of file.
+    :rtype: bool
+    :returns: Whether the file was moved; False if another worker moved it first.
+    """
+    try:
+        os.rename(os.path.join(job_directory, *source), os.path.join(job_directory, *destination))
+    except OSError:
+        return False
+    return True
+
+
+def _retry(job_directory, job, running_name, reason):
+    """
+    Returns a shard whose attempt failed to the queue, or to failed once it has had max_attempts attempts.
+
+    :type running_name: str
+    :param running_name: Name of shard's file in running.
+    :type reason: str
+    :param reason: Description of failure, recorded in errors.
+    :returns: Nothing.
+    """
+    shard, attempt = running_name.split(".")[:2]
+    next_name = "{0}.{1}".format(shard, int(attempt) + 1)
+    with open(os.path.join(job_directory, _ERRORS, "{0}.{1}.txt".format(shard, attempt)), "w") as error_file:
+        error_file.write(reason)
+    destination = _QUEUE if int(attempt) + 1 < job["max_attempts"] else _FAILED
+    _move(job_directory, (_RUNNING, running_name), (destination, next_name))
+
+
+def requeue_stale_shards(job_directory, stale_timeout):
+    """
+    Retries shards whose workers have not reported progress within a timeout, presumed to have died.
+
+    :type job_directory: str
+    :param job_directory: Directory of job.
+    :type stale_timeout: float
+    :param stale_timeout: Time since a worker last reported progress after which its shard is retried (s).
+    :rtype: int
+    :returns: Number of shards retried.
+    """
+    job = load_job(job_directory)
+    now = time.time()
+    retried = 0
+    for name in os.listdir(os.path.join(job_directory, _RUNNING)):
+        try:
+            last_progress = os.path.getmtime(os.path.join(job_directory, _RUNNING, name))
+        except OSError:
+            continue
+        if now - last_progress > stale_timeout:
+            _retry(job_directory, job, name, "Worker {0} made no progress for {1} s".format(
+                name.split(".", 2)[2], stale_timeout))
+            retried += 1
+    return retried
+
+
+def _compute_shard(job_directory, job, shard_index, running_path):
+    """
+    Computes magnitudes of one shard into its output catalogue.
+    Output is written under a temporary name and renamed into place, so a shard's output is either complete
+    or absent. Shards are deterministic, so if two workers compute the same shard, the first output is kept.
+
+    :returns: Nothing.
+    """
+    system = band_systems.get_band_system(job["band_system"])
+    band_indices = [system.index(band) for band in job["bands"]]
+    output_path = os.path.join(job_directory, _OUTPUTS, _shard_name(shard_index))
+    temp_path = tempfile.mkdtemp(dir=os.path.join(job_directory, _OUTPUTS), prefix=".tmp")
+    try:
+        with catalogue.BinaryCatalogueWriter(temp_path, job["bands"]) as writer:
+            for radii, distances, temps in catalogue.read_catalogue(job["input_path"], catalogue.CATALOGUE_COLUMNS,
+                                                                    job["chunk_size"],
+                                                                    tuple(job["shards"][shard_index])):
+                mags = system.magnitudes(temps, radii, distances, band_indices=band_indices)
+                writer.write(*mags.T)
+                # Progress is reported, so that other workers do not take this shard for stale.
+                os.utime(running_path, None)
+        if not os.path.isdir(output_path):
+            try:
+                os.rename(temp_path, output_path)
+            except OSError:
+                # Another worker's output was renamed into place first.
+                if not os.path.isdir(output_path):
+                    raise
+    finally:
+        if os.path.isdir(temp_path):
+            shutil.rmtree(temp_path, ignore_errors=True)
+
+
+def _get_worker_id():
+    """
+    :returns: Identifier of this process unique across nodes, containing no dots.
+    """
+    return "{0}-{1}".format(socket.gethostname(), os.getpid()).replace(".", "_")
+
+
+def run_worker(job_directory, worker_id=None, stale_timeout=600.0, verbose=False):
+    """
+    Claims and computes queued shards of a job until none are left.
+    Any number of workers may run at once, in any processes on any nodes sharing the job directory.
+
+    :type job_directory: str
+    :param job_directory: Directory of job.
+    :type worker_id: str
+    :param worker_id: Identifier of worker, without dots. Defaults to host name and process ID.
+    :type stale_timeout: float
+    :param stale_timeout: Time after which shards claimed by workers which made no progress are retried (s).
+    :type verbose: bool
+    :param verbose: Whether to print each shard computed and the time it took.
+    :rtype: int
+    :returns: Number of shards this worker completed.
+    """
+    job = load_job(job_directory)
+    if worker_id is None:
+        worker_id = _get_worker_id()
+    completed = 0
+    while True:
+        queued = sorted(os.listdir(os.path.join(job_directory, _QUEUE)))
+        if not queued:
+            if requeue_stale_shards(job_directory, stale_timeout):
+                continue
+            return completed
+        for queued_name in queued:
+            running_name = "{0}.{1}".format(queued_name, worker_id)
+            if _move(job_directory, (_QUEUE, queued_name), (_RUNNING, running_name)):
+                break
+        else:
+            # Every shard seen was claimed by other workers first.
+            continue
+        shard = queued_name.split(".")[0]
+        running_path = os.path.join(job_directory, _RUNNING, running_name)
+        if os.path.exists(os.path.join(job_directory, _DONE, shard)):
+            # A retried shard completed by a worker presumed dead.
+            os.remove(running_path)
+            continue
+        start = time.time()
+        try:
+            _compute_shard(job_directory, job, int(shard), running_path)
+        except Exception:
+            _retry(job_directory, job, running_name, traceback.format_exc())
+            continue
+        _move(job_directory, (_RUNNING, running_name), (_DONE, shard))
+        completed += 1
+        if verbose:
+            print("Worker {0} computed shard {1} in {2:.2f} s".format(worker_id, shard, time.time() - start))
+
+
+def run_local_workers(job_directory, processes=None, stale_timeout=600.0, verbose=False):
+    """
+    Runs workers of a job in several processes on this node, and waits for them to finish.
+
+    :type job_directory: str
+    :param job_directory: Directory of job.
+    :type processes: int
+    :param processes: Number of worker processes. Defaults to the number of CPUs.
+    :type stale_timeout: float
+    :param stale_timeout: Time after which shards claimed by workers which made no progress are retried (s).
+    :type verbose: bool
+    :param verbose: Whether workers print each shard computed.
+    :rtype: dict
+    :returns: Status of job once every worker has finished, as given by get_job_status.
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    workers = [multiprocessing.Process(target=run_worker, args=(job_directory, None, stale_timeout, verbose))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return get_job_status(job_directory)
+
+
+def merge_job_outputs(job_directory, output_path):
+    """
+    Merges outputs of every shard of a completed job, in order of shards, into one catalogue.
+
+    :type job_directory: str
+    :param job_directory: Directory of job.
+    :type output_path: str
+    :param output_path: Path of catalogue to write; a CSV file or a binary columnar catalogue.
+    :rtype: int
+    :returns: Number of stars merged.
+    :raises: ValueError
+    """
+    job = load_job(job_directory)
+    num_shards = len(job["shards"])
+    incomplete = [_shard_name(index) for index in range(num_shards)
+                  if not os.path.exists(os.path.join(job_directory, _DONE, _shard_name(index)))]
+    if incomplete:
+        raise ValueError("Cannot merge job {0}; shards {1} are not done".format(job_directory, ", ".join(incomplete)))
+    num_stars = 0
+    with catalogue.open_catalogue_writer(output_path, job["bands"]) as writer:
+        for index in range(num_shards):
+            shard_path = os.path.join(job_directory, _OUTPUTS, _shard_name(index))
+            for columns in catalogue.read_binary_chunks(shard_path, job["bands"], job["chunk_size"]):
+                writer.write(*columns)
+                num_stars += len(columns[0])
+    return num_stars
+
+
+def main(argv=None):
+    """
+    Command line interface, eg. python batch_jobs.py work <job directory> on each node of a job.
+
+    :type argv: list
+    :param argv: Command line arguments. Defaults to those of this process.
+    :returns: Nothing.
+    """
+    parser = argparse.ArgumentParser(description="Sharded, checkpointed computation of catalogue magnitudes.")
+    commands = parser.add_subparsers(dest="command")
+    create = commands.add_parser("create", help="Create a job from an input catalogue.")
+    create.add_argument("job_directory")
+    create.add_argument("input_path")
+    create.add_argument("--band-system", default=band_systems.DEFAULT_BAND_SYSTEM)
+    create.add_argument("--bands", nargs="+")
+    create.add_argument("--shard-size", type=int, default=10**6)
+    create.add_argument("--max-attempts", type=int, default=3)
+    work = commands.add_parser("work", help="Compute queued shards of a job until none are left.")
+    work.add_argument("job_directory")
+    work.add_argument("--processes", type=int, default=1)
+    work.add_argument("--stale-timeout", type=float, default=600.0)
+    status = commands.add_parser("status", help="Print number of shards in each state.")
+    status.add_argument("job_directory")
+    merge = commands.add_parser("merge", help="Merge outputs of a completed job into one catalogue.")
+    merge.add_argument("job_directory")
+    merge.add_argument("output_path")
+    args = parser.parse_args(argv)
+    if args.command == "create":
+        print("Created {0} shards".format(create_job(args.job_directory, args.input_path, args.band_system,
+                                                     args.bands, args.shard_size, max_attempts=args.max_attempts)))
+    elif args.command == "work":
+        if args.processes > 1:
+            run_local_workers(args.job_directory, args.processes, args.stale_timeout, verbose=True)
+        else:
+            run_worker(args.job_directory, stale_timeout=args.stale_timeout, verbose=True)
+    elif args.command == "status":
+        print(get_job_status(args.job_directory))
+    elif args.command == "merge":
+        print("Merged {0} stars".format(merge_job_outputs(args.job_directory, args.output_path)))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+.. module:: catalogue
+    :synopsis: Streaming reading and writing of star catalogues, and batched magnitudes of catalogued stars.
+
+.. moduleauthor:: Jack Romo <sharrackor@gmail.com>
+
+Catalogues are tables of numeric columns, stored either as CSV files with a header row of column names, or as
+binary columnar directories. A binary columnar directory holds one file per column, named <column>.f8, of raw
+little-endian double precision values; these are memory mapped, so reading them costs no parsing at all.
+"""
+
+from __future__ import division
+import os
+import numpy as np
+import band_systems
+
+CATALOGUE_COLUMNS = ("radius", "distance", "temperature")
+"""Columns read from input catalogues by default: radius (m), distance (m) and temperature (K) of each star."""
+
+BINARY_COLUMN_EXTENSION = ".f8"
+"""Extension of each column file of a binary columnar catalogue."""
+
+_BINARY_DTYPE = np.dtype("<f8")
+# Rows of a CSV catalogue of doubles take about this many bytes per value.
+_CSV_BYTES_PER_VALUE = 25
+
+
+def _is_binary(path):
+    """
+    :returns: Whether path names a binary columnar catalogue rather than a CSV file.
+    """
+    return os.path.isdir(path) or not os.path.splitext(path)[1]
+
+
+def read_csv_chunks(path, columns=CATALOGUE_COLUMNS, chunk_bytes=64 * 2**20, delimiter=",", byte_range=None):
+    """
+    Streams columns of a CSV catalogue in chunks of whole rows.
+    Each chunk is parsed by NumPy in one call, so every column of the file must be numeric.
+
+    :type path: str
+    :param path: Path of CSV file, whose first row holds column names.
+    :type columns: tuple
+    :param columns: Names of columns to read.
+    :type chunk_bytes: int
+    :param chunk_bytes: Approximate number of bytes of the file parsed at once. Bounds memory use.
+    :type delimiter: str
+    :param delimiter: Character separating values within a row.
+    :type byte_range: tuple
+    :param byte_range: A 2-tuple of offsets of the first byte read and the byte after the last, both at the start of
+        a row, as given by split_catalogue. The whole file is read if not given.
+    :returns: Generator of tuples of arrays, one array per column in the order of columns.
+    :raises: ValueError
+    """
+    separator = delimiter.encode("ascii")
+    with open(path, "rb") as csv_file:
+        header = [name.strip() for name in csv_file.readline().decode("utf-8").split(delimiter)]
+        indices = []
+        for column in columns:
+            if column not in header:
+                raise ValueError("Could not identify column {0} in catalogue {1}".format(column, path))
+            indices.append(header.index(column))
+        remaining = None
+        if byte_range is not None:
+            csv_file.seek(byte_range[0])
+            remaining = byte_range[1] - byte_range[0]
+        remainder = b""
+        while True:
+            if remaining is None:
+                block = csv_file.read(chunk_bytes)
+            else:
+                block = csv_file.read(min(chunk_bytes, remaining))
+                remaining -= len(block)
+            if not block:
+                block, remainder = remainder, b""
+            else:
+                # Only whole rows are parsed; the partial row at the end of the block is kept for the next one.
+                block = remainder + block
+                end = block.rfind(b"\n") + 1
+                block, remainder = block[:end], block[end:]
+                if not block:
+                    continue
+            block = block.strip()
+            if not block:
+                return
+            num_rows = block.count(b"\n") + 1
+            try:
+                values = np.fromstring(block.replace(b"\r", b"").replace(b"\n", separator).decode("ascii"),
+                                       dtype=np.float64, sep=delimiter)
+            except (ValueError, UnicodeDecodeError):
+                values = None
+            if values is None or values.size != num_rows * len(header):
+                raise ValueError("Could not parse catalogue {0}; every row must have {1} numeric values".format(
+                    path, len(header)))
+            table = values.reshape(num_rows, len(header))
+            yield tuple(table[:, i] for i in indices)
+
+
+def read_binary_chunks(directory, columns=CATALOGUE_COLUMNS, chunk_size=2**20, row_range=None):
+    """
+    Streams columns of a binary columnar catalogue in chunks, by memory mapping each column file.
+
+    :type directory: str
+    :param directory: Path of binary columnar catalogue.
+    :type columns: tuple
+    :param columns: Names of columns to read.
+    :type chunk_size: int
+    :param chunk_size: Number of rows in each chunk.
+    :type row_range: tuple
+    :param row_range: A 2-tuple of the index of the first row read and of the row after the last.
+        All rows are read if not given.
+    :returns: Generator of tuples of arrays, one array per column in the order of columns.
+        Arrays are read-only views of the files.
+    :raises: ValueError
+    """
+    maps = []
+    for column in columns:
+        path = os.path.join(directory, column + BINARY_COLUMN_EXTENSION)
+        if not os.path.isfile(path):
+            raise ValueError("Could not identify column {0} in catalogue {1}".format(column, directory))
+        if os.path.getsize(path) == 0:
+            maps.append(np.zeros(0, dtype=_BINARY_DTYPE))
+        else:
+            maps.append(np.memmap(path, dtype=_BINARY_DTYPE, mode="r"))
+    num_rows = len(maps[0]) if maps else 0
+    if any(len(column_map) != num_rows for column_map in maps):
+        raise ValueError("Columns of catalogue {0} have different lengths".format(directory))
+    first, last = (0, num_rows) if row_range is None else (row_range[0], min(row_range[1], num_rows))
+    for start in range(first, last, chunk_size):
+        stop = min(start + chunk_size, last)
+        yield tuple(column_map[start:stop] for column_map in maps)
+
+
+def _count_binary_rows(directory):
+    """
+    :returns: Number of rows of a binary columnar catalogue, from the size of its first column file.
+    :raises: ValueError
+    """
+    names = sorted(name for name in os.listdir(directory) if name.endswith(BINARY_COLUMN_EXTENSION))
+    if not names:
+        raise ValueError("Could not identify any columns in catalogue {0}".format(directory))
+    return os.path.getsize(os.path.join(directory, names[0])) // _BINARY_DTYPE.itemsize
+
+
+def split_catalogue(path, shard_size):
+    """
+    Splits a catalogue into shards of consecutive rows. The same catalogue and shard size always give the same shards.
+    Shards of binary columnar catalogues are ranges of rows. Shards of CSV files are ranges of bytes, starting on
+    row boundaries, so that finding them needs no parsing.
+
+    :type path: str
+    :param path: Path of catalogue.
+    :type shard_size: int
+    :param shard_size: Number of rows in each shard. Approximate for CSV files.
+    :rtype: list
+    :returns: List of 2-tuples of start and stop of each shard, to pass to read_catalogue.
+    """
+    if _is_binary(path):
+        num_rows = _count_binary_rows(path)
+        return [(start, min(start + shard_size, num_rows)) for start in range(0, num_rows, shard_size)]
+    shard_bytes = max(shard_size * _CSV_BYTES_PER_VALUE * len(CATALOGUE_COLUMNS), 1)
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as csv_file:
+        csv_file.readline()
+        boundaries = [csv_file.tell()]
+        while boundaries[-1] < file_size:
+            # Each boundary is moved forward to the start of the next row.
+            csv_file.seek(boundaries[-1] + shard_bytes - 1)
+            csv_file.readline()
+            boundaries.append(min(csv_file.tell(), file_size))
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def read_catalogue(path, columns=CATALOGUE_COLUMNS, chunk_size=2**20, shard=None):
+    """
+    Streams columns of a catalogue in chunks, in whichever format path names.
+    Paths of directories or without an extension are binary columnar catalogues, and all others CSV files.
+
+    :type path: str
+    :param path: Path of catalogue.
+    :type columns: tuple
+    :param columns: Names of columns to read.
+    :type chunk_size: int
+    :param chunk_size: Approximate number of rows in each chunk.
+    :type shard: tuple
+    :param shard: A shard given by split_catalogue, to read only its rows. All rows are read if not given.
+    :returns: Generator of tuples of arrays, one array per column in the order of columns.
+    """
+    if _is_binary(path):
+        return read_binary_chunks(path, columns, chunk_size, row_range=shard)
+    return read_csv_chunks(path, columns, chunk_bytes=max(chunk_size * _CSV_BYTES_PER_VALUE * len(columns), 2**16),
+                           byte_range=shard)
+
+
+class CsvCatalogueWriter(object):
+    """
+    Writes columns to a CSV catalogue chunk by chunk.
+    Formatting text dominates the cost of writing CSV; binary columnar catalogues are written at the speed of the disk.
+    """
+
+    def __init__(self, path, columns, delimiter=",", significant_figures=17):
+        """
+        :type path: str
+        :param path: Path of CSV file to write. Any existing file is replaced.
+        :type columns: tuple
+        :param columns: Names of columns, written as the header row.
+        :type delimiter: str
+        :param delimiter: Character separating values within a row.
+        :type significant_figures: int
+        :param significant_figures: Number of significant figures written. At 17, values are read back exactly;
+            fewer are written faster.
+        """
+        self.path = path
+        self.columns = tuple(columns)
+        self._row_format = delimiter.join(["%.{0}g".format(significant_figures)] * len(self.columns)) + "\n"
+        self._file = open(path, "w")
+        self._file.write(delimiter.join(self.columns) + "\n")
+
+    def write(self, *arrays):
+        """
+        Appends rows to the catalogue.
+
+        :param arrays: One array per column, in the order of columns, all of the same length.
+        :returns: Nothing.
+        """
+        table = np.column_stack([np.asarray(array, dtype=np.float64) for array in arrays])
+        # One string formatting operation per chunk, rather than one per row.
+        self._file.write((self._row_format * len(table)) % tuple(table.ravel().tolist()))
+
+    def close(self):
+        """
+        :returns: Nothing.
+        """
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BinaryCatalogueWriter(object):
+    """
+    Writes columns to a binary columnar catalogue chunk by chunk, appending raw values to each column file.
+    """
+
+    def __init__(self, directory, columns):
+        """
+        :type directory: str
+        :param directory: Path of binary columnar catalogue to write. Created if it does not exist;
+            existing files of the same columns are replaced.
+        :type columns: tuple
+        :param columns: Names of columns.
+        """
+        self.directory = directory
+        self.columns = tuple(columns)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._files = [open(os.path.join(directory, column + BINARY_COLUMN_EXTENSION), "wb")
+                       for column in self.columns]
+
+    def write(self, *arrays):
+        """
+        Appends rows to the catalogue.
+
+        :param arrays: One array per column, in the order of columns, all of the same length.
+        :returns: Nothing.
+        """
+        for column_file, array in zip(self._files, arrays):
+            column_file.write(np.ascontiguousarray(array, dtype=_BINARY_DTYPE).tobytes())
+
+    def close(self):
+        """
+        :returns: Nothing.
+        """
+        for column_file in self._files:
+            column_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_catalogue_writer(path, columns):
+    """
+    Opens a writer of a catalogue in whichever format path names, as for read_catalogue.
+
+    :type path: str
+    :param path: Path of catalogue to write.
+    :type columns: tuple
+    :param columns: Names of columns.
+    :rtype: CsvCatalogueWriter, BinaryCatalogueWriter
+    :returns: Writer of catalogue.
+    """
+    if _is_binary(path):
+        return BinaryCatalogueWriter(path, columns)
+    return CsvCatalogueWriter(path, columns)
+
+
+def compute_catalogue_magnitudes(input_path, output_path, band_system=band_systems.DEFAULT_BAND_SYSTEM,
+                                 bands=None, chunk_size=2**20):
+    """
+    Computes magnitudes of every star of a catalogue, streaming chunks of stars from input to output.
+    Input and output may each be a CSV file or a binary columnar catalogue.
+
+    :type input_path: str
+    :param input_path: Path of catalogue with radius, distance and temperature columns.
+    :type output_path: str
+    :param output_path: Path of catalogue to write, with one column of magnitudes per wave band.
+    :type band_system: str, BandSystem
+    :param band_system: Band system to get magnitudes within.
+    :type bands: list
+    :param bands: Names of wave bands to compute. All bands of the system are computed if not given.
+    :type chunk_size: int
+    :param chunk_size: Approximate number of stars processed at once. Bounds memory use.
+    :rtype: int
+    :returns: Number of stars processed.
+    :raises: ValueError
+    """
+    system = band_systems.get_band_system(band_system)
+    if bands is None:
+        bands = system.band_names
+    band_indices = [system.index(band) for band in bands]
+    num_stars = 0
+    with open_catalogue_writer(output_path, bands) as writer:
+        for radii, distances, temps in read_catalogue(input_path, CATALOGUE_COLUMNS, chunk_size):
+            mags = system.magnitudes(temps, radii, distances, band_indices=band_indices)
+            writer.write(*mags.T)
+            num_stars += len(temps)
+    return num_stars
@@ -19,6 +19,8 @@ PARSEC = 3.086e16
 """Length of one parsec (m)."""
 SOLAR_RADIUS = 695500e3
 """Radius of the sun (m)."""
+SOLAR_LUMINOSITY = 3.828e26
+"""Luminosity of the sun (W)."""
 
 U_WAVELENGTH = 0.35e-6
 """Wave band length for U filter (m)."""
@@ -28,6 +30,8 @@ V_WAVELENGTH = 0.5465e-6
 """Wave band length for B filter (m)."""
 R_WAVELENGTH = 0.6470e-6
 """Wave band length for R filter (m)."""
+I_WAVELENGTH = 0.798e-6
+"""Wave band length for I filter (m)."""
 
 VEGA_U_FLUX = 4.172e15
 """Flux of Vega through U filter."""
@@ -37,3 +41,7 @@ VEGA_V_FLUX = 2.127e15
 """Flux of Vega through V filter."""
 VEGA_R_FLUX = 1.426e15
 """Flux of Vega through R filter."""
+VEGA_TEMPERATURE = 9602.0
+"""Effective surface temperature of Vega (K)."""
+AB_ZERO_POINT_FLUX_DENSITY = 3631e-26
+"""Flux density per unit frequency of a source of AB magnitude zero, ie. 3631 Jy (W / (m^2 * Hz))."""
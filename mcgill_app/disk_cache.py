@@ -0,0 +1,265 @@
+"""
+.. module:: disk_cache
+    :synopsis: Opt-in persistent cache of evaluated arrays, shared between runs and processes.
+
+.. moduleauthor:: Jack Romo <sharrackor@gmail.com>
+
+"""
+
+from __future__ import division
+import hashlib
+import numbers
+import os
+import tempfile
+import numpy as np
+import version
+
+CACHE_DIR_ENV_VAR = "MCGILL_APP_CACHE_DIR"
+"""Environment variable which, if set, names the directory of the cache enabled by enable_from_environment."""
+CACHE_SIZE_ENV_VAR = "MCGILL_APP_CACHE_MAX_BYTES"
+"""Environment variable which, if set, overrides the size cap of the cache enabled by enable_from_environment."""
+
+try:
+    _STRING_TYPES = (str, bytes, unicode)
+except NameError:
+    _STRING_TYPES = (str, bytes)
+
+
+def has_stable_repr(value):
+    """
+    Whether the repr of a value is the same in every run, so that it can be part of a persistent key.
+    Objects whose repr holds their memory address, eg. instances of most classes, are not.
+
+    :param value: Value to check.
+    :rtype: bool
+    :returns: True if value is None, a number, a string or a class, or a tuple or list of such values.
+    """
+    if value is None or isinstance(value, _STRING_TYPES + (numbers.Number, type)):
+        return True
+    if isinstance(value, (tuple, list)):
+        return all(has_stable_repr(item) for item in value)
+    return False
+
+
+class DiskCache(object):
+    """
+    A directory of arrays, each stored in a file named by a hash of everything the arrays were computed from.
+    The least recently used files are deleted once the directory grows past a size cap.
+    Files are written under temporary names and renamed into place, so concurrent processes never read
+    partial files; at worst two processes compute and write the same entry.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 2**20):
+        """
+        :type directory: str
+        :param directory: Directory to keep cached arrays in. Created if it does not exist.
+        :type max_bytes: int
+        :param max_bytes: Total size of cached files above which the least recently used are deleted.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another process may have created it first.
+                if not os.path.isdir(directory):
+                    raise
+
+    @staticmethod
+    def make_key(*parts):
+        """
+        Hashes everything a cached result depends on, together with the package version.
+
+        :param parts: Values that determine the result. Their repr must be the same in every run.
+        :rtype: str
+        :returns: Hexadecimal key of result.
+        """
+        return hashlib.sha256(repr((version.__version__,) + parts).encode("utf-8")).hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def get(self, key):
+        """
+        :type key: str
+        :param key: Key made by make_key.
+        :rtype: dict
+        :returns: Names mapped to arrays stored under key, or None if nothing is stored.
+        """
+        path = self._get_path(key)
+        try:
+            with np.load(path) as data:
+                arrays = dict((name, data[name]) for name in data.files)
+            # Modification time records last use, for eviction.
+            os.utime(path, None)
+        except (IOError, OSError, ValueError):
+            return None
+        return arrays
+
+    def put(self, key, arrays):
+        """
+        Stores arrays under key, then evicts least recently used files if the cache is over its size cap.
+
+        :type key: str
+        :param key: Key made by make_key.
+        :type arrays: dict
+        :param arrays: Names mapped to arrays to store.
+        :returns: Nothing.
+        """
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as temp_file:
+                np.savez(temp_file, **arrays)
+            if hasattr(os, "replace"):
+                os.replace(temp_path, self._get_path(key))
+            else:
+                os.rename(temp_path, self._get_path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._evict()
+
+    def get_or_compute(self, parts, compute):
+        """
+        Gets arrays cached for parts, or computes and stores them if they are not cached.
+        If any of parts has no stable repr (see has_stable_repr), its key would differ between runs,
+        so the arrays are computed and not stored.
+
+        :type parts: tuple
+        :param parts: Values that determine the result, passed to make_key.
+        :type compute: function
+        :param compute: Function taking no arguments, returning a dict of names mapped to arrays.
+        :rtype: dict
+        :returns: Names mapped to arrays.
+        """
+        if not has_stable_repr(parts):
+            return dict((name, np.asarray(value)) for name, value in compute().items())
+        key = self.make_key(*parts)
+        arrays = self.get(key)
+        if arrays is None:
+            # Results come back as arrays whether or not they were cached.
+            arrays = dict((name, np.asarray(value)) for name, value in compute().items())
+            self.put(key, arrays)
+        return arrays
+
+    def get_size(self):
+        """
+        :rtype: int
+        :returns: Total size of cached files in bytes.
+        """
+        return sum(size for _, size, _ in self._list_entries())
+
+    def _list_entries(self):
+        """
+        :returns: List of 3-tuples of last use time, size and path of each cached file.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        """
+        Deletes least recently used files until the cache is within its size cap.
+
+        :returns: Nothing.
+        """
+        entries = sorted(self._list_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Already evicted by another process.
+                pass
+            total -= size
+
+    def clear(self):
+        """
+        Deletes every cached file.
+
+        :returns: Nothing.
+        """
+        for _, _, path in self._list_entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_active_cache = None
+
+
+def enable(directory, max_bytes=256 * 2**20):
+    """
+    Turn on caching of PlottedFunction.get_xy_vals and other cached results in a directory.
+
+    :type directory: str
+    :param directory: Directory to keep cached arrays in.
+    :type max_bytes: int
+    :param max_bytes: Total size of cached files above which the least recently used are deleted.
+    :rtype: DiskCache
+    :returns: The enabled cache.
+    """
+    global _active_cache
+    _active_cache = DiskCache(directory, max_bytes)
+    return _active_cache
+
+
+def enable_from_environment():
+    """
+    Turn on caching if the MCGILL_APP_CACHE_DIR environment variable is set.
+
+    :rtype: DiskCache
+    :returns: The enabled cache, or None if the environment variable is not set.
+    """
+    directory = os.environ.get(CACHE_DIR_ENV_VAR, "")
+    if not directory:
+        return None
+    max_bytes = os.environ.get(CACHE_SIZE_ENV_VAR, "")
+    if max_bytes:
+        return enable(directory, int(max_bytes))
+    return enable(directory)
+
+
+def disable():
+    """
+    Turn off caching. Cached files are kept.
+
+    :returns: Nothing.
+    """
+    global _active_cache
+    _active_cache = None
+
+
+def get_active_cache():
+    """
+    :rtype: DiskCache
+    :returns: The enabled cache, or None if caching is off.
+    """
+    return _active_cache
+
+
+def cached(parts, compute):
+    """
+    Gets arrays from the enabled cache, or computes them (storing them if caching is on).
+
+    :type parts: tuple
+    :param parts: Values that determine the result, passed to DiskCache.make_key.
+    :type compute: function
+    :param compute: Function taking no arguments, returning a dict of names mapped to arrays.
+    :rtype: dict
+    :returns: Names mapped to arrays.
+    """
+    if _active_cache is None:
+        return compute()
+    return _active_cache.get_or_compute(parts, compute)
@@ -0,0 +1,278 @@
+"""
+.. module:: fitting
+    :synopsis: Fitting black body models of stars to observed multi-band light curves, by differential evolution.
+
+.. moduleauthor:: Jack Romo <sharrackor@gmail.com>
+
+"""
+
+from __future__ import division
+import abc
+import math
+import timeit
+import numpy as np
+import band_systems
+
+
+class LightCurve(object):
+    """
+    Observed magnitudes of one star, each taken at some time in some wave band of a band system.
+    """
+
+    def __init__(self, times, bands, magnitudes, errors, band_system=band_systems.DEFAULT_BAND_SYSTEM):
+        """
+        :type times: list, numpy.ndarray
+        :param times: Time of each observation (s).
+        :type bands: list
+        :param bands: Name of wave band of each observation.
+        :type magnitudes: list, numpy.ndarray
+        :param magnitudes: Observed magnitude of each observation.
+        :type errors: float, list, numpy.ndarray
+        :param errors: Standard error of magnitude of each observation.
+        :type band_system: str, BandSystem
+        :param band_system: Band system containing all wave bands.
+        :raises: ValueError
+        """
+        self.band_system = band_systems.get_band_system(band_system)
+        self.times = np.asarray(times, dtype=np.float64)
+        self.magnitudes = np.asarray(magnitudes, dtype=np.float64)
+        self.errors = np.broadcast_to(np.asarray(errors, dtype=np.float64), self.magnitudes.shape)
+        self.band_indices = np.array([self.band_system.index(band) for band in bands], dtype=np.intp)
+        if not len(self.times) == len(self.band_indices) == len(self.magnitudes):
+            raise ValueError("Every observation needs one time, one wave band and one magnitude")
+        if np.any(self.errors <= 0):
+            raise ValueError("Errors of observations must be positive")
+        self._inverse_errors = 1.0 / self.errors
+
+    def __len__(self):
+        return len(self.magnitudes)
+
+    def get_chi_squares(self, model, parameters):
+        """
+        Evaluates chi-square of many candidate parameter vectors of a model at once.
+
+        :type model: LightCurveModel
+        :param model: Model of star whose parameters are being fit.
+        :type parameters: numpy.ndarray
+        :param parameters: Array of shape (number of candidates, number of model parameters).
+        :rtype: numpy.ndarray
+        :returns: Chi-square of each candidate. Infinite where the model magnitudes are not finite.
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            residuals = (model.get_magnitudes(parameters, self) - self.magnitudes) * self._inverse_errors
+            chi_squares = np.einsum("ij,ij->i", residuals, residuals)
+        chi_squares[~np.isfinite(chi_squares)] = np.inf
+        return chi_squares
+
+
+class LightCurveModel(object):
+    """
+    Base class of models of stars, giving magnitudes of observations from a vector of parameters.
+    Models are evaluated for many parameter vectors at once, so that a whole population of candidates
+    is evaluated in one pass.
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    parameter_names = ()
+    """Names of parameters, in the order of columns of parameter arrays."""
+
+    @abc.abstractmethod
+    def get_magnitudes(self, parameters, light_curve):
+        """
+        :type parameters: numpy.ndarray
+        :param parameters: Array of shape (number of candidates, number of parameters).
+        :type light_curve: LightCurve
+        :param light_curve: Observations to model.
+        :rtype: numpy.ndarray
+        :returns: Array of shape (number of candidates, number of observations) of model magnitudes.
+        """
+
+
+class StaticStarModel(LightCurveModel):
+    """
+    A star of constant temperature and radius. Only the ratio of radius to distance affects magnitudes,
+    so one of the two should be fixed by giving it equal bounds.
+    """
+
+    parameter_names = ("temperature", "radius", "distance")
+
+    def get_magnitudes(self, parameters, light_curve):
+        return light_curve.band_system.magnitudes_in_bands(parameters[:, 0:1], light_curve.band_indices,
+                                                           parameters[:, 1:2], parameters[:, 2:3])
+
+
+class PulsatingStarModel(LightCurveModel):
+    """
+    A radially pulsating star. Over each period, radius varies as R * (1 + radius_amplitude * sin(p)) and
+    temperature as T * (1 + temperature_amplitude * cos(p)), where p = 2 * pi * (t / period + phase), so that
+    the star is hottest a quarter period before it is largest.
+    """
+
+    parameter_names = ("temperature", "radius", "distance", "temperature_amplitude", "radius_amplitude", "period",
+                       "phase")
+
+    def get_magnitudes(self, parameters, light_curve):
+        angles = 2 * math.pi * (light_curve.times / parameters[:, 5:6] + parameters[:, 6:7])
+        temps = parameters[:, 0:1] * (1 + parameters[:, 3:4] * np.cos(angles))
+        radii = parameters[:, 1:2] * (1 + parameters[:, 4:5] * np.sin(angles))
+        return light_curve.band_system.magnitudes_in_bands(temps, light_curve.band_indices, radii,
+                                                           parameters[:, 2:3])
+
+
+class FitResult(object):
+    """
+    Best parameters found by a fit, with a record of how the fit progressed.
+    """
+
+    def __init__(self, parameter_names, parameters, chi_square, evaluations, iteration_times, converged):
+        """
+        :type parameter_names: tuple
+        :param parameter_names: Name of each parameter.
+        :type parameters: numpy.ndarray
+        :param parameters: Best parameter vector found.
+        :type chi_square: float
+        :param chi_square: Objective value of best parameter vector.
+        :type evaluations: int
+        :param evaluations: Number of parameter vectors evaluated.
+        :type iteration_times: list
+        :param iteration_times: Wall clock time taken by each iteration (s).
+        :type converged: bool
+        :param converged: Whether the population converged before the iteration limit.
+        """
+        self.parameter_names = tuple(parameter_names)
+        self.parameters = parameters
+        self.chi_square = chi_square
+        self.evaluations = evaluations
+        self.iteration_times = iteration_times
+        self.iterations = len(iteration_times)
+        self.converged = converged
+
+    def get_parameter(self, name):
+        """
+        :type name: str
+        :param name: Name of parameter.
+        :rtype: float
+        :returns: Best value of parameter.
+        :raises: ValueError
+        """
+        if name not in self.parameter_names:
+            raise ValueError("Could not identify parameter {0}".format(name))
+        return float(self.parameters[self.parameter_names.index(name)])
+
+
+def differential_evolution(objective, bounds, population_size=None, max_iterations=1000, mutation=(0.5, 1.0),
+                           crossover=0.9, tolerance=1e-8, seed=None, verbose=False, parameter_names=None):
+    """
+    Minimises an objective function within bounds by differential evolution (DE/rand/1/bin).
+    Each iteration evaluates the trial vectors of the whole population in one call of objective.
+    Parameters are evolved in the unit cube and scaled onto their bounds, so parameters of very different
+    magnitudes evolve equally well.
+
+    :type objective: function
+    :param objective: Function taking an array of shape (number of vectors, number of parameters) and returning
+        an array of the objective value of each vector.
+    :type bounds: list
+    :param bounds: A 2-tuple of lowest and highest value of each parameter. Equal values fix a parameter.
+    :type population_size: int
+    :param population_size: Number of parameter vectors evolved. Defaults to 15 per parameter.
+    :type max_iterations: int
+    :param max_iterations: Number of iterations after which evolution stops even if it has not converged.
+    :type mutation: float, tuple
+    :param mutation: Differential weight, or a 2-tuple of a range from which it is drawn each iteration.
+    :type crossover: float
+    :param crossover: Probability of each parameter of a trial vector being taken from the mutant vector.
+    :type tolerance: float
+    :param tolerance: Evolution stops once the spread of objective values is within tolerance of their mean.
+    :type seed: int
+    :param seed: Seed of random number generator. Equal seeds give equal results.
+    :type verbose: bool
+    :param verbose: Whether to print the best objective value and time taken after each iteration.
+    :type parameter_names: tuple
+    :param parameter_names: Name of each parameter, for the result.
+    :rtype: FitResult
+    :returns: Best parameter vector found.
+    :raises: ValueError
+    """
+    bounds = np.asarray(bounds, dtype=np.float64)
+    if bounds.ndim != 2 or bounds.shape[1] != 2 or np.any(bounds[:, 0] > bounds[:, 1]):
+        raise ValueError("Bounds must be a (low, high) pair for each parameter, with low <= high")
+    num_parameters = len(bounds)
+    if population_size is None:
+        population_size = 15 * num_parameters
+    if population_size < 4:
+        raise ValueError("Differential evolution needs a population of at least 4")
+    if parameter_names is None:
+        parameter_names = tuple("x{0}".format(i) for i in range(num_parameters))
+    low, span = bounds[:, 0], bounds[:, 1] - bounds[:, 0]
+    random_state = np.random.RandomState(seed)
+    timer = timeit.default_timer
+
+    population = random_state.random_sample((population_size, num_parameters))
+    values = np.asarray(objective(low + span * population), dtype=np.float64)
+    evaluations = population_size
+    members = np.arange(population_size)
+    iteration_times = []
+    converged = False
+    for iteration in range(max_iterations):
+        start = timer()
+        # Three distinct members other than itself are chosen for each member, by sorting random keys.
+        keys = random_state.random_sample((population_size, population_size))
+        keys[members, members] = np.inf
+        chosen = np.argsort(keys, axis=1)[:, :3]
+        if np.ndim(mutation):
+            weight = random_state.uniform(mutation[0], mutation[1])
+        else:
+            weight = mutation
+        mutants = population[chosen[:, 0]] + weight * (population[chosen[:, 1]] - population[chosen[:, 2]])
+        # Mutants outside the unit cube are pulled back to a random point between their base vector and the bound.
+        outside = (mutants < 0) | (mutants > 1)
+        if np.any(outside):
+            bases = population[chosen[:, 0]]
+            edges = np.clip(mutants, 0, 1)
+            fractions = random_state.random_sample(mutants.shape)
+            mutants = np.where(outside, bases + fractions * (edges - bases), mutants)
+        crossed = random_state.random_sample((population_size, num_parameters)) < crossover
+        crossed[members, random_state.randint(num_parameters, size=population_size)] = True
+        trials = np.where(crossed, mutants, population)
+        trial_values = np.asarray(objective(low + span * trials), dtype=np.float64)
+        evaluations += population_size
+        improved = trial_values <= values
+        population[improved] = trials[improved]
+        values[improved] = trial_values[improved]
+        iteration_times.append(timer() - start)
+        if verbose:
+            print("Iteration {0}: best objective {1:.6g}, {2:.2f} ms".format(iteration + 1, values.min(),
+                                                                            1000 * iteration_times[-1]))
+        if np.all(np.isfinite(values)) and np.std(values) <= tolerance * abs(np.mean(values)) + 1e-300:
+            converged = True
+            break
+    best = np.argmin(values)
+    return FitResult(parameter_names, low + span * population[best], float(values[best]), evaluations,
+                     iteration_times, converged)
+
+
+def fit_light_curve(light_curve, model, bounds, **options):
+    """
+    Fits a model of a star to a light curve, minimising chi-square by differential evolution.
+
+    :type light_curve: LightCurve
+    :param light_curve: Observations to fit.
+    :type model: LightCurveModel
+    :param model: Model whose parameters are fit.
+    :type bounds: dict
+    :param bounds: Name of each model parameter mapped to a 2-tuple of its lowest and highest value.
+        Equal values fix a parameter.
+    :param options: Keyword arguments of differential_evolution, eg. seed, max_iterations or verbose.
+    :rtype: FitResult
+    :returns: Best fitting parameters, with chi-square as objective value.
+    :raises: ValueError
+    """
+    names = model.parameter_names
+    unknown = set(bounds) - set(names)
+    missing = set(names) - set(bounds)
+    if unknown or missing:
+        raise ValueError("Could not identify bounds of parameters; unknown {0}, missing {1}".format(
+            sorted(unknown), sorted(missing)))
+    return differential_evolution(lambda parameters: light_curve.get_chi_squares(model, parameters),
+                                  [bounds[name] for name in names], parameter_names=names, **options)
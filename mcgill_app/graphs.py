@@ -7,8 +7,15 @@
 """
 
 from __future__ import division
+import os
+import subprocess
+import numpy as np
+import matplotlib
+import matplotlib.colors as colors
 import matplotlib.pyplot as plt
-matplotlib.use('GTK')
+import matplotlib.transforms as transforms
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 class FunctionsGraph(object):
     """
@@ -28,6 +35,8 @@ class FunctionsGraph(object):
         self.y_label = y_label
         self.title = title
         self.functions = []
+        # Evaluated (xs, ys) series of functions from the last plot, keyed by function, range and spacing.
+        self._series = {}
 
     def add_plotted_function(self, func, style="g-", label=""):
         """
@@ -59,13 +68,306 @@ class FunctionsGraph(object):
         :param unit_factor_y: Factor to multiply x values by to get into correct units on graph.
         :returns: Nothing.
         """
+        evaluated = {}
+        # Scale raw function values into graph units with a transform, so that cached series stay valid.
+        unit_transform = transforms.Affine2D().scale(unit_factor_x, unit_factor_y) + plt.gca().transData
         for func_map in self.functions:
-            function = func_map["function"]
-            xs, ys = function.get_xy_vals(x_range=x_range, point_spacing=point_spacing)
-            plt.plot([x * unit_factor_x for x in xs],
-                     [y * unit_factor_y for y in ys], func_map["style"], label=func_map["label"])
+            xs, ys = self._get_series(func_map["function"], x_range, point_spacing, evaluated)
+            plt.plot(xs, ys, func_map["style"], label=func_map["label"], transform=unit_transform)
+        self._series = evaluated
         plt.legend()
         plt.xlabel(self.x_label)
         plt.ylabel(self.y_label)
         plt.suptitle(self.title, fontsize=12)
         plt.show()
+
+    def _get_series(self, function, x_range, point_spacing, evaluated):
+        """
+        Gets x and y values of a function, only evaluating it if it changed since the last plot.
+
+        :type function: PlottedFunction
+        :param function: The function to get values of.
+        :type x_range: tuple
+        :param x_range: A 2-tuple specifying lowest and highest x values on x-axis.
+        :type point_spacing: float
+        :param point_spacing: The space between x values of each plotted point on the graph.
+        :type evaluated: dict
+        :param evaluated: Series evaluated during current plot. The requested series is added to it.
+        :returns: Two lists, one of all x values and another of respective y values.
+        """
+        function_key = function.get_cache_key()
+        # Functions without a key may have been changed in place, so they are evaluated on every plot.
+        if function_key is None:
+            return function.get_xy_vals(x_range=x_range, point_spacing=point_spacing)
+        key = (function_key, tuple(x_range), point_spacing)
+        if key not in evaluated:
+            if key in self._series:
+                evaluated[key] = self._series[key]
+            else:
+                evaluated[key] = function.get_xy_vals(x_range=x_range, point_spacing=point_spacing)
+        return evaluated[key]
+
+    def plot_heatmap(self, z_values, x_values, y_values, unit_factor_x=1.0, unit_factor_y=1.0,
+                     color_map="inferno", z_label="", log_scale=False, invert_y=False):
+        """
+        Plots a 2-D matrix of values as a single image, eg. a temperature by wavelength flux grid.
+        Rows of z_values correspond to y values and columns to x values. Both must be evenly spaced.
+
+        :type z_values: numpy.ndarray
+        :param z_values: Matrix of shape (len(y_values), len(x_values)) to be drawn.
+        :type x_values: list, numpy.ndarray
+        :param x_values: Evenly spaced x values of each column of z_values.
+        :type y_values: list, numpy.ndarray
+        :param y_values: Evenly spaced y values of each row of z_values.
+        :type unit_factor_x: float
+        :param unit_factor_x: Factor to multiply x values by to get into correct units on graph.
+        :type unit_factor_y: float
+        :param unit_factor_y: Factor to multiply y values by to get into correct units on graph.
+        :type color_map: str
+        :param color_map: Name of matplotlib colour map to shade values with.
+        :type z_label: str
+        :param z_label: Label of colour bar, describing values of z_values.
+        :type log_scale: bool
+        :param log_scale: Whether to shade values on a logarithmic scale. Values of zero or less are left blank.
+        :type invert_y: bool
+        :param invert_y: Whether y values decrease up the graph, eg. magnitudes on a colour-magnitude diagram.
+        :returns: Nothing.
+        :raises: ValueError
+        """
+        z_values = np.asarray(z_values)
+        if z_values.shape != (len(y_values), len(x_values)):
+            raise ValueError("Shape of z_values does not match x_values and y_values")
+        # Pixel centres lie on given values, so extend extent by half a pixel either side.
+        half_dx = (x_values[-1] - x_values[0]) / max(len(x_values) - 1, 1) / 2
+        half_dy = (y_values[-1] - y_values[0]) / max(len(y_values) - 1, 1) / 2
+        extent = [(x_values[0] - half_dx) * unit_factor_x, (x_values[-1] + half_dx) * unit_factor_x,
+                  (y_values[0] - half_dy) * unit_factor_y, (y_values[-1] + half_dy) * unit_factor_y]
+        norm = None
+        if log_scale:
+            z_values = np.ma.masked_less_equal(z_values, 0)
+            norm = colors.LogNorm()
+        image = plt.imshow(z_values, extent=extent, origin="lower", aspect="auto",
+                           interpolation="nearest", cmap=color_map, norm=norm)
+        plt.colorbar(image, label=z_label)
+        if invert_y:
+            plt.gca().invert_yaxis()
+        plt.xlabel(self.x_label)
+        plt.ylabel(self.y_label)
+        plt.suptitle(self.title, fontsize=12)
+        plt.show()
+
+
+class AnimatedFunctionsGraph(FunctionsGraph):
+    """
+    A FunctionsGraph that animates sweeps of curves, eg. black body spectra as temperature changes, into a file.
+    Axes, labels and legend are drawn once; only the curves are redrawn for each frame using blitting.
+    """
+
+    def __init__(self, x_label="", y_label="", title=""):
+        """
+        :type x_label: str
+        :param x_label: Label of x axis.
+        :type y_label: str
+        :param y_label: Label of y axis.
+        :type title: str
+        :param title: Title of graph displayed directly above.
+        """
+        super(AnimatedFunctionsGraph, self).__init__(x_label=x_label, y_label=y_label, title=title)
+        self.sweeps = []
+
+    def add_sweep(self, y_frames, style="g-", label=""):
+        """
+        Append a pre-evaluated sweep of a curve to the graph, which will be drawn when animated.
+        All frames should be evaluated at once, eg. with plotted_functions.planck_flux_grid.
+
+        :type y_frames: numpy.ndarray
+        :param y_frames: Array of shape (number of frames, number of x values), one row of y values per frame.
+        :type style: str
+        :param style: The styling of the curve's line on the graph. Must be in matplotlib style.
+        :type label: str
+        :param label: Name of curve that will be put in legend of graph.
+        :returns: Nothing.
+        """
+        self.sweeps.append({"frames": np.asarray(y_frames, dtype=np.float64),
+                            "style": style,
+                            "label": label})
+
+    def animate(self, file_name, x_values, frame_labels=None, fps=24, unit_factor_x=1.0, unit_factor_y=1.0,
+                size=(8, 6), dpi=100):
+        """
+        Renders every frame of all sweeps without a display and writes them to an animation file.
+        Files ending in .gif are written with Pillow, all others are encoded by ffmpeg.
+
+        :type file_name: str
+        :param file_name: Path of animation file to write.
+        :type x_values: list, numpy.ndarray
+        :param x_values: The x values that every row of every sweep was evaluated at.
+        :type frame_labels: list
+        :param frame_labels: Optional text to show in the corner of each frame, eg. the swept temperature.
+        :type fps: int
+        :param fps: Frames per second of animation.
+        :type unit_factor_x: float
+        :param unit_factor_x: Factor to multiply x values by to get into correct units on graph.
+        :type unit_factor_y: float
+        :param unit_factor_y: Factor to multiply y values by to get into correct units on graph.
+        :type size: tuple
+        :param size: A 2-tuple of the width and height of the animation in inches.
+        :type dpi: int
+        :param dpi: Number of pixels per inch of animation.
+        :returns: Nothing.
+        :raises: ValueError
+        """
+        x_values = np.asarray(x_values, dtype=np.float64)
+        if not self.sweeps:
+            raise ValueError("No sweeps to animate")
+        num_frames = len(self.sweeps[0]["frames"])
+        for sweep in self.sweeps:
+            if sweep["frames"].shape != (num_frames, len(x_values)):
+                raise ValueError("All sweeps must have one row per frame and one column per x value")
+        if frame_labels is not None and len(frame_labels) != num_frames:
+            raise ValueError("Number of frame labels does not match number of frames")
+        figure = Figure(figsize=size, dpi=dpi)
+        canvas = FigureCanvasAgg(figure)
+        axes = figure.add_subplot(111)
+        unit_transform = transforms.Affine2D().scale(unit_factor_x, unit_factor_y) + axes.transData
+        lines = [axes.plot(x_values, sweep["frames"][0], sweep["style"], label=sweep["label"],
+                           transform=unit_transform, animated=True)[0]
+                 for sweep in self.sweeps]
+        frame_text = axes.text(0.02, 0.95, "", transform=axes.transAxes, animated=True)
+        # Axis limits are fixed across frames, so that the static background can be reused.
+        all_ys = np.concatenate([sweep["frames"].ravel() for sweep in self.sweeps])
+        all_ys = all_ys[np.isfinite(all_ys)]
+        axes.set_xlim(x_values.min() * unit_factor_x, x_values.max() * unit_factor_x)
+        if len(all_ys):
+            y_limits = sorted([all_ys.min() * unit_factor_y, all_ys.max() * unit_factor_y])
+            margin = (y_limits[1] - y_limits[0]) * 0.05 or abs(y_limits[0]) * 0.05 or 1.0
+            axes.set_ylim(y_limits[0] - margin, y_limits[1] + margin)
+        if any(sweep["label"] for sweep in self.sweeps):
+            axes.legend()
+        axes.set_xlabel(self.x_label)
+        axes.set_ylabel(self.y_label)
+        figure.suptitle(self.title, fontsize=12)
+        canvas.draw()
+        background = canvas.copy_from_bbox(figure.bbox)
+        width, height = canvas.get_width_height()
+        writer = _open_frame_writer(file_name, width, height, fps)
+        try:
+            for frame in range(num_frames):
+                canvas.restore_region(background)
+                for line, sweep in zip(lines, self.sweeps):
+                    line.set_ydata(sweep["frames"][frame])
+                    axes.draw_artist(line)
+                if frame_labels is not None:
+                    frame_text.set_text(frame_labels[frame])
+                    axes.draw_artist(frame_text)
+                writer.write(canvas.buffer_rgba())
+        finally:
+            writer.close()
+
+
+def _open_frame_writer(file_name, width, height, fps):
+    """
+    Opens a writer of raw RGBA frames suited to the extension of file_name.
+
+    :type file_name: str
+    :param file_name: Path of animation file to write.
+    :type width: int
+    :param width: Width of each frame in pixels.
+    :type height: int
+    :param height: Height of each frame in pixels.
+    :type fps: int
+    :param fps: Frames per second of animation.
+    :returns: Writer with write(buffer) and close() methods.
+    """
+    if os.path.splitext(file_name)[1].lower() == ".gif":
+        return _GifFrameWriter(file_name, width, height, fps)
+    return _FFMpegFrameWriter(file_name, width, height, fps)
+
+
+class _GifFrameWriter(object):
+    """
+    Collects frames with Pillow and saves them as an animated GIF when closed.
+    """
+
+    def __init__(self, file_name, width, height, fps):
+        """
+        :type file_name: str
+        :param file_name: Path of GIF file to write.
+        :type width: int
+        :param width: Width of each frame in pixels.
+        :type height: int
+        :param height: Height of each frame in pixels.
+        :type fps: int
+        :param fps: Frames per second of animation.
+        """
+        from PIL import Image
+        self._image_module = Image
+        self.file_name = file_name
+        self.size = (width, height)
+        self.fps = fps
+        self.frames = []
+
+    def write(self, buffer):
+        """
+        Adds one frame to the animation.
+
+        :type buffer: memoryview, bytes
+        :param buffer: RGBA pixels of frame, row by row from the top, as drawn by FigureCanvasAgg.
+        :returns: Nothing.
+        """
+        image = self._image_module.frombuffer("RGBA", self.size, bytes(buffer), "raw", "RGBA", 0, 1)
+        # Fast octree quantization (method 2) keeps palette reduction from dominating encoding time.
+        self.frames.append(image.convert("RGB").quantize(method=2))
+
+    def close(self):
+        """
+        Saves all frames written as an animated GIF, looping forever.
+
+        :returns: Nothing.
+        """
+        if self.frames:
+            self.frames[0].save(self.file_name, save_all=True, append_images=self.frames[1:],
+                                duration=int(round(1000 / self.fps)), loop=0)
+
+
+class _FFMpegFrameWriter(object):
+    """
+    Pipes raw frames into an ffmpeg process, which encodes them into a video file.
+    """
+
+    def __init__(self, file_name, width, height, fps):
+        """
+        :type file_name: str
+        :param file_name: Path of video file to write.
+        :type width: int
+        :param width: Width of each frame in pixels.
+        :type height: int
+        :param height: Height of each frame in pixels.
+        :type fps: int
+        :param fps: Frames per second of animation.
+        """
+        command = [matplotlib.rcParams["animation.ffmpeg_path"], "-y", "-loglevel", "error",
+                   "-f", "rawvideo", "-pix_fmt", "rgba", "-s", "{0}x{1}".format(width, height),
+                   "-r", str(fps), "-i", "-", "-pix_fmt", "yuv420p", file_name]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, buffer):
+        """
+        Adds one frame to the animation.
+
+        :type buffer: memoryview, bytes
+        :param buffer: RGBA pixels of frame, row by row from the top, as drawn by FigureCanvasAgg.
+        :returns: Nothing.
+        """
+        self.process.stdin.write(bytes(buffer))
+
+    def close(self):
+        """
+        Waits for ffmpeg to finish encoding all frames written.
+
+        :returns: Nothing.
+        :raises: IOError
+        """
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise IOError("ffmpeg failed to encode animation")
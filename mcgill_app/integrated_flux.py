@@ -0,0 +1,249 @@
+"""
+.. module:: integrated_flux
+    :synopsis: Black body fluxes integrated over wave bands and over all wavelengths, evaluated as series.
+
+.. moduleauthor:: Jack Romo <sharrackor@gmail.com>
+
+"""
+
+from __future__ import division
+import math
+import numpy as np
+import constants
+
+_RADIANCE_FACTOR = 2 * constants.BOLTZMANN_CONST ** 4 / (constants.PLANCK_CONST ** 3 * constants.LIGHT_SPEED ** 2)
+"""Integral of Planck's law over wavelength is _RADIANCE_FACTOR * T^4 * integral of x^3 / (e^x - 1) over x."""
+_EXPONENT_FACTOR = constants.PLANCK_CONST * constants.LIGHT_SPEED / constants.BOLTZMANN_CONST
+"""Wavelength l at temperature T corresponds to x = _EXPONENT_FACTOR / (l * T)."""
+_FULL_INTEGRAL = math.pi ** 4 / 15
+"""Integral of x^3 / (e^x - 1) from 0 to infinity."""
+_SERIES_SWITCH = 2.0
+"""Below this x the integral from 0 is summed, above it the integral to infinity."""
+_MAX_TERMS = 200
+_LOWER_BOUND_INTERVALS = 16
+"""Number of sub-intervals of each band used to bound its integral from below."""
+_NARROW_BAND_WIDTH = 1.0
+"""Bands narrower than this in x are integrated by Gauss-Legendre quadrature rather than as differences of series."""
+_GAUSS_LEGENDRE_NODES, _GAUSS_LEGENDRE_WEIGHTS = np.polynomial.legendre.leggauss(12)
+
+
+def _small_x_coefficients(num_terms):
+    """
+    Coefficients B_k / k! of the expansion x / (e^x - 1) = sum of B_k * x^k / k!, where B_k are Bernoulli numbers.
+    Uses B_2m / (2m)! = (-1)^(m + 1) * 2 * zeta(2m) / (2 * pi)^2m.
+
+    :type num_terms: int
+    :param num_terms: Number of coefficients to compute.
+    :rtype: numpy.ndarray
+    :returns: First num_terms coefficients.
+    """
+    coefficients = np.zeros(num_terms)
+    coefficients[0] = 1.0
+    coefficients[1] = -0.5
+    # Sums of n^-2m converge slowly for small m, so their exact values are used instead.
+    exact_zetas = {1: math.pi ** 2 / 6, 2: math.pi ** 4 / 90, 3: math.pi ** 6 / 945}
+    n = np.arange(1, 1001, dtype=np.float64)
+    for m in range(1, (num_terms + 1) // 2):
+        zeta = exact_zetas[m] if m in exact_zetas else np.sum(n ** (-2.0 * m))
+        coefficients[2 * m] = (-1) ** (m + 1) * 2 * zeta / (2 * math.pi) ** (2 * m)
+    return coefficients
+
+
+_SMALL_X_COEFFICIENTS = _small_x_coefficients(_MAX_TERMS)
+
+
+def _integral_from_zero(x, abs_tolerances):
+    """
+    Integral of t^3 / (e^t - 1) from 0 to x, for 0 <= x < 2 * pi, summed as sum of B_k * x^(k + 3) / (k! * (k + 3)).
+
+    :type x: numpy.ndarray
+    :param x: Upper limits of integral.
+    :type abs_tolerances: numpy.ndarray
+    :param abs_tolerances: Absolute error of each integral at which summing stops.
+    :rtype: numpy.ndarray
+    :returns: Integral for each upper limit.
+    """
+    # Coefficients past B_1 are zero for odd k, so only even terms are summed after the first two.
+    x_squared = x ** 2
+    power = x_squared * x
+    total = power * (_SMALL_X_COEFFICIENTS[0] / 3 + _SMALL_X_COEFFICIENTS[1] * x / 4)
+    for k in range(2, _MAX_TERMS, 2):
+        power = power * x_squared
+        term = _SMALL_X_COEFFICIENTS[k] * power / (k + 3)
+        total += term
+        if np.all(np.abs(term) <= abs_tolerances):
+            break
+    return total
+
+
+def _integral_to_infinity(x, abs_tolerances):
+    """
+    Integral of t^3 / (e^t - 1) from x to infinity, for x > 0, summed as the series over n of
+    e^(-n * x) * (x^3 / n + 3 * x^2 / n^2 + 6 * x / n^3 + 6 / n^4).
+    Each element stops being summed once it has converged, so large x need only a few terms.
+
+    :type x: numpy.ndarray
+    :param x: Lower limits of integral.
+    :type abs_tolerances: numpy.ndarray
+    :param abs_tolerances: Absolute error of each integral at which summing stops.
+    :rtype: numpy.ndarray
+    :returns: Integral for each lower limit.
+    """
+    total = np.zeros_like(x)
+    active = np.arange(len(x))
+    x_active = x
+    tolerances_active = abs_tolerances
+    decay = np.exp(-x_active)
+    decay_n = decay
+    for n in range(1, _MAX_TERMS + 1):
+        inverse_n = 1.0 / n
+        polynomial = x_active ** 3 + inverse_n * (3 * x_active ** 2 + inverse_n * (6 * x_active + 6 * inverse_n))
+        term = decay_n * inverse_n * polynomial
+        total[active] += term
+        # The remaining terms sum to at most term * e^-x / (1 - e^-x).
+        unconverged = term * decay > tolerances_active * (1 - decay)
+        if not np.any(unconverged):
+            break
+        active, x_active, decay = active[unconverged], x_active[unconverged], decay[unconverged]
+        tolerances_active = tolerances_active[unconverged]
+        decay_n = decay_n[unconverged] * decay
+    return total
+
+
+def _integrand(x):
+    """
+    :returns: x^3 / (e^x - 1), which is 0 at x = 0.
+    """
+    with np.errstate(over="ignore", invalid="ignore"):
+        return np.where(x > 0, x ** 3 / np.expm1(np.maximum(x, 1e-300)), 0.0)
+
+
+def _band_integral_lower_bound(x_low, x_high):
+    """
+    Lower bound of the integral of t^3 / (e^t - 1) from x_low to x_high.
+    The integrand rises to a single peak then falls, so on any interval it is at least the lesser of its values at
+    the interval's ends; the bound sums that over geometrically spaced sub-intervals.
+
+    :type x_low: numpy.ndarray
+    :param x_low: 1-D array of lower limits of integral, each at least 0.
+    :type x_high: numpy.ndarray
+    :param x_high: 1-D array of upper limits of integral, each above x_low.
+    :rtype: numpy.ndarray
+    :returns: Positive lower bound of integral for each pair of limits, where the integral is representable.
+    """
+    fractions = np.linspace(0.0, 1.0, _LOWER_BOUND_INTERVALS + 1)
+    # Geometric spacing resolves wide bands at both ends; it needs a positive lower limit.
+    start = np.maximum(x_low, x_high * 1e-3)
+    points = start[:, np.newaxis] * (x_high / start)[:, np.newaxis] ** fractions
+    points[:, 0] = x_low
+    values = _integrand(points)
+    return np.sum(np.minimum(values[:, :-1], values[:, 1:]) * np.diff(points, axis=1), axis=1)
+
+
+def _band_integral(x_low, x_high, tolerance, x_widths):
+    """
+    Integral of t^3 / (e^t - 1) from x_low to x_high, choosing the faster converging series for each element.
+    Bands are differences of two partial integrals, so each partial integral is summed to an absolute error set by
+    a lower bound of the band's integral, rather than relative to the partial integral itself.
+    Narrow bands, whose partial integrals would cancel almost entirely, are instead integrated directly by 12 point
+    Gauss-Legendre quadrature; the integrand has no poles within 2 * pi of the real axis, so over a width of at most
+    _NARROW_BAND_WIDTH this is accurate to double precision.
+
+    :type x_low: numpy.ndarray
+    :param x_low: 1-D array of lower limits of integral, each at least 0.
+    :type x_high: numpy.ndarray
+    :param x_high: 1-D array of upper limits of integral, each above x_low.
+    :type tolerance: float
+    :param tolerance: Relative error of integral at which summing series stops.
+    :type x_widths: numpy.ndarray
+    :param x_widths: x_high - x_low, computed without subtracting x_high and x_low, which would lose the precision of
+        narrow bands.
+    :rtype: numpy.ndarray
+    :returns: Integral for each pair of limits.
+    """
+    # Error is shared between the two partial integrals making up each band.
+    abs_tolerances = 0.5 * tolerance * _band_integral_lower_bound(x_low, x_high)
+    result = np.empty_like(x_low)
+    narrow = x_widths <= _NARROW_BAND_WIDTH
+    half_widths = 0.5 * x_widths[narrow]
+    nodes = (x_low[narrow] + half_widths)[:, np.newaxis] + half_widths[:, np.newaxis] * _GAUSS_LEGENDRE_NODES
+    with np.errstate(under="ignore"):
+        result[narrow] = half_widths * np.dot(_integrand(nodes), _GAUSS_LEGENDRE_WEIGHTS)
+    both_small = ~narrow & (x_high < _SERIES_SWITCH)
+    both_large = ~narrow & (x_low >= _SERIES_SWITCH)
+    mixed = ~(narrow | both_small | both_large)
+    result[both_small] = (_integral_from_zero(x_high[both_small], abs_tolerances[both_small]) -
+                          _integral_from_zero(x_low[both_small], abs_tolerances[both_small]))
+    with np.errstate(under="ignore"):
+        result[both_large] = (_integral_to_infinity(x_low[both_large], abs_tolerances[both_large]) -
+                              _integral_to_infinity(x_high[both_large], abs_tolerances[both_large]))
+        result[mixed] = (_FULL_INTEGRAL - _integral_from_zero(x_low[mixed], abs_tolerances[mixed]) -
+                         _integral_to_infinity(x_high[mixed], abs_tolerances[mixed]))
+    return result
+
+
+def band_radiance(temperatures, min_wavelength, max_wavelength, tolerance=1e-12):
+    """
+    Integrates Planck's law over a wave band analytically, ie. the radiance of black bodies within the band.
+    Each integral is summed as a convergent series until it is accurate to tolerance relative to its value.
+
+    :type temperatures: int, float, numpy.ndarray
+    :param temperatures: Temperature or array of temperatures of black bodies (K).
+    :type min_wavelength: float
+    :param min_wavelength: Shortest wavelength of wave band (m).
+    :type max_wavelength: float
+    :param max_wavelength: Longest wavelength of wave band (m). May be infinite.
+    :type tolerance: float
+    :param tolerance: Relative error at which summing series stops.
+    :rtype: numpy.ndarray
+    :returns: Radiance within wave band of each black body (W * sr^-1 * m^-2).
+    :raises: ValueError
+    """
+    if not 0 < min_wavelength < max_wavelength:
+        raise ValueError("Wave band must be positive and increasing")
+    temps = np.asarray(temperatures, dtype=np.float64)
+    if not np.all(temps > 0):
+        raise ValueError("Temperatures must be positive")
+    flat_temps = temps.ravel()
+    # Shortest wavelength gives highest x, so longest wavelength is the lower limit of the integral over x.
+    x_short = _EXPONENT_FACTOR / (min_wavelength * flat_temps)
+    x_long = _EXPONENT_FACTOR / (max_wavelength * flat_temps)
+    if math.isinf(max_wavelength):
+        x_widths = x_short
+    else:
+        band_width = (max_wavelength - min_wavelength) / (min_wavelength * max_wavelength)
+        x_widths = _EXPONENT_FACTOR * band_width / flat_temps
+    integral = _band_integral(x_long, x_short, tolerance, x_widths)
+    return (_RADIANCE_FACTOR * flat_temps ** 4 * integral).reshape(temps.shape)
+
+
+def band_flux(temperatures, min_wavelength, max_wavelength, tolerance=1e-12):
+    """
+    Flux emitted from the surface of black bodies within a wave band, ie. pi times band_radiance.
+
+    :type temperatures: int, float, numpy.ndarray
+    :param temperatures: Temperature or array of temperatures of black bodies (K).
+    :type min_wavelength: float
+    :param min_wavelength: Shortest wavelength of wave band (m).
+    :type max_wavelength: float
+    :param max_wavelength: Longest wavelength of wave band (m). May be infinite.
+    :type tolerance: float
+    :param tolerance: Relative error at which summing series stops.
+    :rtype: numpy.ndarray
+    :returns: Flux within wave band of each black body (W * m^-2).
+    """
+    return math.pi * band_radiance(temperatures, min_wavelength, max_wavelength, tolerance)
+
+
+def bolometric_flux(temperatures):
+    """
+    Flux emitted from the surface of black bodies over all wavelengths, ie. the Stefan-Boltzmann law.
+    The Stefan-Boltzmann constant is derived from the other constants, so that bolometric and band fluxes agree;
+    it matches constants.STEFAN_BOLTZMANN_CONST to within 1%.
+
+    :type temperatures: int, float, numpy.ndarray
+    :param temperatures: Temperature or array of temperatures of black bodies (K).
+    :rtype: numpy.ndarray
+    :returns: Flux of each black body (W * m^-2).
+    """
+    return math.pi * _RADIANCE_FACTOR * _FULL_INTEGRAL * np.asarray(temperatures, dtype=np.float64) ** 4
@@ -5,15 +5,20 @@
 .. moduleauthor:: Jack Romo <sharrackor@gmail.com>
 
 """
+import argparse
 import os
 import matplotlib as mpl
 if os.environ.get('DISPLAY','') == '':
     print('no display found. Using non-interactive Agg backend')
     mpl.use('Agg')
 import matplotlib.pyplot as plt
+import numpy as np
+import band_systems
 import graphs
-import constantsimport plotted_functions as pf
-import star
+import constants
+import disk_cache
+import plotted_functions as pf
+import population as pop
 
 def plot_blackbody_fluxes():
     """
@@ -33,6 +38,39 @@ def plot_blackbody_fluxes():
     graph.plot(x_range=(0.1e-6, 6e-6), point_spacing=0.02e-6, unit_factor_x=10**9)
 
 
+def plot_blackbody_flux_heatmap():
+    """
+    Plot heatmap of black body fluxes against wavelength and temperature.
+    Every temperature between 1000K and 10_000K is evaluated in a single operation and drawn as one image.
+    """
+    graph = graphs.FunctionsGraph(x_label="wavelength / nm", y_label="Temperature / K",
+                                  title="Black Body Flux Spectra")
+    temperature_grid = (1000.0, 10000.0, 1000)
+    wavelength_grid = (0.1e-6, 6e-6, 10000)
+    temperatures = np.linspace(*temperature_grid)
+    wavelengths = np.linspace(*wavelength_grid)
+    fluxes = disk_cache.cached(("planck_flux_grid", temperature_grid, wavelength_grid),
+                               lambda: {"fluxes": pf.planck_flux_grid(temperatures, wavelengths)})["fluxes"]
+    graph.plot_heatmap(fluxes, wavelengths, temperatures, unit_factor_x=10**9, z_label="flux / W * sr^-1 * m^-3")
+
+
+def animate_blackbody_fluxes(file_name="blackbody_fluxes.gif"):
+    """
+    Animate black body flux against wavelength as temperature sweeps from 3000K to 10_000K.
+    Every frame is evaluated in a single operation before any are drawn.
+
+    :type file_name: str
+    :param file_name: Path of animation file to write. Must end in .gif, or another extension ffmpeg can encode.
+    """
+    graph = graphs.AnimatedFunctionsGraph(x_label="wavelength / nm", y_label="flux / W * sr^-1 * m^-3",
+                                          title="Black Body Flux")
+    temperatures = np.linspace(3000.0, 10000.0, 120)
+    wavelengths = np.linspace(0.1e-6, 3e-6, 500)
+    graph.add_sweep(pf.planck_flux_grid(temperatures, wavelengths), style="r-")
+    graph.animate(file_name, wavelengths, frame_labels=["{0}K".format(int(temp)) for temp in temperatures],
+                  unit_factor_x=10**9)
+
+
 def plot_ubvr_mags():
     """
     Plots U, B, V, and R magnitudes of a star against possible temperatures between 1000K and 10_000K.
@@ -52,22 +90,58 @@ def print_ubvr_mags():
     """
     print("Temperature (K)\t| U \t| B \t| V \t| R")
     print("-"*16 + ("+" + "-"*7)*4)
-    for temperature in range(1000, 11000, 1000):
-        st = star.Star(constants.SOLAR_RADIUS, 10*constants.PARSEC, temperature)
+    system = band_systems.get_band_system("johnson_cousins")
+    band_indices = [system.index(band) for band in ["u", "b", "v", "r"]]
+    temperatures = list(range(1000, 11000, 1000))
+    table = disk_cache.cached(("ubvr_mag_table", system.name, temperatures),
+                              lambda: {"mags": system.magnitudes(temperatures, constants.SOLAR_RADIUS,
+                                                                 10*constants.PARSEC)})["mags"]
+    for temperature, mags in zip(temperatures, table):
         print("{0}\t\t\t| {1:.1f}\t| {2:.1f}\t| {3:.1f}\t| {4:.1f}".format(temperature,
-                                                                           st.get_u_mag(),
-                                                                           st.get_b_mag(),
-                                                                           st.get_v_mag(),
-                                                                           st.get_r_mag()))
+                                                                           *[mags[i] for i in band_indices]))
 
 
-def main():
+def plot_colour_magnitude_diagram(num_stars=10**7):
+    """
+    Plots binned colour-magnitude diagram of V magnitude against B-V colour for a synthetic stellar population.
+    Stars follow a Salpeter initial mass function, spread uniformly within 1000 parsecs of Earth.
+
+    :type num_stars: int
+    :param num_stars: Number of stars in population.
+    """
+    graph = graphs.FunctionsGraph(x_label="B - V", y_label="V", title="Colour-Magnitude Diagram")
+    population = pop.StellarPopulation(num_stars, seed=0)
+
+    def compute_histogram():
+        histogram = population.colour_magnitude_histogram(colour_bands=("b", "v"), magnitude_band="v")
+        colours, mags = histogram.get_bin_centres()
+        return {"counts": histogram.counts, "colours": colours, "mags": mags}
+
+    arrays = disk_cache.cached(("colour_magnitude_diagram", sorted(vars(population).items())), compute_histogram)
+    graph.plot_heatmap(arrays["counts"], arrays["colours"], arrays["mags"], color_map="viridis",
+                       z_label="Number of stars", log_scale=True, invert_y=True)
+
+
+def main(argv=None):
     """
     Main function of program. Called to execute entire system.
+    Results are cached on disk between runs if the MCGILL_APP_CACHE_DIR environment variable is set.
+
+    :type argv: list
+    :param argv: Command line arguments. Defaults to those of this process.
     """
+    parser = argparse.ArgumentParser(description="Plot black body fluxes and star magnitudes.")
+    parser.add_argument("--animate", metavar="FILE",
+                        help="Also write an animation of black body flux as temperature rises, eg. to fluxes.gif.")
+    args = parser.parse_args(argv)
+    disk_cache.enable_from_environment()
     plot_blackbody_fluxes()
+    plot_blackbody_flux_heatmap()
     plot_ubvr_mags()
     print_ubvr_mags()
+    plot_colour_magnitude_diagram()
+    if args.animate:
+        animate_blackbody_fluxes(args.animate)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+"""
+.. module:: planck_kernels
+    :synopsis: Evaluation of Planck's law at selectable precision, trading precision for speed.
+
+.. moduleauthor:: Jack Romo <sharrackor@gmail.com>
+
+Planck's law is B = prefactor / (e^x - 1), with prefactor = 2hc^2 / l^5 and x = hc / (l * k * T).
+Evaluating it over large grids is limited by memory traffic rather than arithmetic, so each accuracy tier chooses
+the precision of the arrays it works in:
+
+* exact: double precision. This is the reference for the other tiers.
+* fast: single precision, which halves memory traffic; over a grid of 1000 temperatures by 10000 wavelengths,
+  planck_flux_grid runs about 1.4 times as fast as with the exact tier.
+  e^x - 1 overflows a single precision float beyond x = 88, so where x > FAST_TIER_MAX_EXPONENT Wien's approximation
+  e^-x is used instead.
+
+Independently of the tier, extended_range keeps fluxes finite beyond the x at which e^x - 1 overflows a double,
+using Wien's approximation, which is exact to double precision there.
+"""
+
+from __future__ import division
+import numpy as np
+
+ACCURACY_TIERS = ("exact", "fast")
+"""Names of accuracy tiers, from most to least precise."""
+
+MAX_RELATIVE_ERRORS = {"exact": 0.0, "fast": 2e-5}
+"""
+Maximum relative error of each accuracy tier against the exact tier.
+For the fast tier this holds where x <= FAST_TIER_MAX_EXPONENT and the result is a normal single precision float.
+Single precision cannot hold x more exactly than x * 6e-8, so beyond that bound the error grows in proportion to x,
+though the flux there is already under e^-80 of its Rayleigh-Jeans scale.
+"""
+
+FAST_TIER_MAX_EXPONENT = 80.0
+"""Largest x for which the fast tier's maximum relative error is guaranteed."""
+
+EXTENDED_RANGE_MIN_EXPONENT = 700.0
+"""x above which extended range evaluation uses Wien's approximation, short of where e^x overflows a double."""
+
+_WIEN_THRESHOLDS = {"exact": EXTENDED_RANGE_MIN_EXPONENT, "fast": FAST_TIER_MAX_EXPONENT}
+
+
+def _wien(prefactors, x):
+    """
+    :returns: Wien's approximation prefactors * e^-x.
+    """
+    # Multiplying by e^-x/2 twice keeps the result from underflowing before it is scaled by the prefactor.
+    half_decay = np.exp(np.multiply(x, -0.5))
+    return prefactors * half_decay * half_decay
+
+
+def planck_kernel(prefactors, exponents, accuracy="exact", extended_range=False):
+    """
+    Evaluates prefactors / (e^exponents - 1) at the requested accuracy.
+
+    :type prefactors: numpy.ndarray
+    :param prefactors: Values of 2hc^2 / l^5, broadcastable to the shape of exponents.
+    :type exponents: numpy.ndarray
+    :param exponents: Values of x = hc / (l * k * T).
+    :type accuracy: str
+    :param accuracy: One of ACCURACY_TIERS.
+    :type extended_range: bool
+    :param extended_range: Whether to keep results finite where x > EXTENDED_RANGE_MIN_EXPONENT, rather than
+        letting them fall to zero. Always on for the fast tier, which would otherwise lose results beyond x = 88.
+    :rtype: numpy.ndarray
+    :returns: Planck's law at each element; single precision for the fast tier, double precision otherwise.
+    :raises: ValueError
+    """
+    if accuracy not in MAX_RELATIVE_ERRORS:
+        raise ValueError("Could not identify accuracy tier {0}".format(accuracy))
+    dtype = np.float32 if accuracy == "fast" else np.float64
+    x = np.asarray(exponents, dtype=dtype)
+    prefactors = np.asarray(prefactors, dtype=dtype)
+    wien_range = accuracy == "fast" or extended_range
+    # Capping x, e^x - 1 and the division all share one array, so only one pass over memory allocates.
+    # Capping also keeps e^x - 1 from overflowing, which is far slower than evaluating it.
+    if wien_range:
+        result = np.minimum(x, _WIEN_THRESHOLDS[accuracy])
+        np.expm1(result, out=result)
+    else:
+        with np.errstate(over="ignore"):
+            result = np.expm1(x)
+    np.divide(prefactors, result, out=result)
+    if wien_range and x.size and x.max() > _WIEN_THRESHOLDS[accuracy]:
+        # Elements beyond the cap are few in practice, so only they are gathered and recomputed.
+        # Flat indices are found several times faster than per-axis ones, then unravelled only for the few elements.
+        beyond = np.unravel_index(np.flatnonzero(x > _WIEN_THRESHOLDS[accuracy]), x.shape)
+        result[beyond] = _wien(np.broadcast_to(prefactors, x.shape)[beyond], x[beyond])
+    return result
@@ -9,8 +9,43 @@
 from __future__ import division
 import math
 import abc
+import numpy as np
+import band_systems
 import constants
-import star
+import disk_cache
+import planck_kernels
+
+_PLANCK_NUMERATOR = 2 * constants.PLANCK_CONST * (constants.LIGHT_SPEED ** 2)
+"""Numerator 2hc^2 of Planck's law."""
+_PLANCK_EXPONENT_FACTOR = (constants.PLANCK_CONST * constants.LIGHT_SPEED) / constants.BOLTZMANN_CONST
+"""Exponent of Planck's law is _PLANCK_EXPONENT_FACTOR / (l * T)."""
+
+
+def planck_flux_grid(temperatures, wavelengths, accuracy="exact", extended_range=False):
+    """
+    Evaluates Planck's law for every combination of temperature and wavelength in one broadcast operation.
+    All factors that depend only on wavelength are computed once per wavelength rather than once per point.
+
+    :type temperatures: list, numpy.ndarray
+    :param temperatures: 1-D sequence of black body temperatures (K).
+    :type wavelengths: list, numpy.ndarray
+    :param wavelengths: 1-D sequence of wavelengths (m).
+    :type accuracy: str
+    :param accuracy: Accuracy tier of planck_kernels; "exact" or "fast" (single precision).
+    :type extended_range: bool
+    :param extended_range: Whether to keep intensities finite where e^x - 1 would overflow, as in planck_kernels.
+    :rtype: numpy.ndarray
+    :returns: Array of shape (len(temperatures), len(wavelengths)) of intensities, one row per temperature.
+    :raises: ValueError
+    """
+    temps = np.asarray(temperatures, dtype=np.float64)
+    lambdas = np.asarray(wavelengths, dtype=np.float64)
+    # Wavelength-only terms: 2hc^2 / l^5 and hc / (l * k).
+    prefactor = (2 * constants.PLANCK_CONST * (constants.LIGHT_SPEED ** 2)) / (lambdas ** 5)
+    exponent_factor = (constants.PLANCK_CONST * constants.LIGHT_SPEED) / (lambdas * constants.BOLTZMANN_CONST)
+    dtype = np.float32 if accuracy == "fast" else np.float64
+    exponents = exponent_factor.astype(dtype)[np.newaxis, :] / temps.astype(dtype)[:, np.newaxis]
+    return planck_kernels.planck_kernel(prefactor, exponents, accuracy, extended_range)
 
 
 class PlottedFunction(object):
@@ -40,11 +75,53 @@ class PlottedFunction(object):
         """
         return [self(x) for x in arg_ls]
 
+    def get_cache_key(self):
+        """
+        Gets a hashable key identifying this function and its parameters.
+        Two functions with equal keys are assumed to give equal results for all inputs.
+        Functions with a parameter that cannot be hashed have no key, as it may be changed in place.
+
+        :returns: Hashable key of function class and parameters, or None if there is none.
+        """
+        try:
+            key = (type(self), tuple(sorted(self._get_key_parameters().items())))
+            hash(key)
+        except TypeError:
+            # Either a parameter cannot be hashed, or parameters are not held in a __dict__ that vars can read.
+            return None
+        return key
+
+    def _get_key_parameters(self):
+        """
+        :rtype: dict
+        :returns: Name of each parameter of function mapped to its value, as identified by get_cache_key.
+        """
+        return vars(self)
+
     def get_xy_vals(self, x_range, point_spacing=1.0):
         """
         Gets two lists of points, one for x values of coordinates and one for y values.
         The two together can be used to plot the function over a given range and to a given accuracy.
 
+        :type x_range: tuple
+        :param x_range: A 2-tuple of the minimum and maximum x values to plot.
+        :type point_spacing: float
+        :param point_spacing: The distance between x values in range of x values used.
+        :returns: Two lists, one of all x values and another of respective y values for points on graph.
+        """
+        cache = disk_cache.get_active_cache()
+        key = self.get_cache_key()
+        if cache is None or key is None:
+            return self._evaluate_xy_vals(x_range, point_spacing)
+        arrays = cache.get_or_compute(
+            ("get_xy_vals", key, tuple(x_range), point_spacing),
+            lambda: dict(zip(("x", "y"), self._evaluate_xy_vals(x_range, point_spacing))))
+        return arrays["x"].tolist(), arrays["y"].tolist()
+
+    def _evaluate_xy_vals(self, x_range, point_spacing):
+        """
+        Evaluates the points returned by get_xy_vals, without consulting the disk cache.
+
         :type x_range: tuple
         :param x_range: A 2-tuple of the minimum and maximum x values to plot.
         :type point_spacing: float
@@ -70,7 +147,20 @@ class PlottedPlanckFunction(PlottedFunction):
         :type temperature: float, int
         :param temperature: Temperature of black body, in Kelvin.
         """
-        self.temp = float(temperature)
+        self.temp = temperature
+
+    @property
+    def temp(self):
+        """
+        Temperature of black body, in Kelvin.
+        """
+        return self._temp
+
+    @temp.setter
+    def temp(self, temperature):
+        self._temp = float(temperature)
+        # hc / (k * T), so that each call only divides it by wavelength.
+        self._exponent_factor = _PLANCK_EXPONENT_FACTOR / self._temp
 
     def __call__(self, l):
         """
@@ -80,29 +170,106 @@ class PlottedPlanckFunction(PlottedFunction):
         :param l: Wavelength of radiation to be analyzed (m).
         :returns: Intensity of wavelength emitted by black body.
         """
-        numerator = 2 * constants.PLANCK_CONST * (constants.LIGHT_SPEED ** 2)
-        denominator = (l**5) * ((math.e ** ((constants.PLANCK_CONST * constants.LIGHT_SPEED) /
-                                            (l * constants.BOLTZMANN_CONST * self.temp))) - 1)
-        return numerator / denominator
+        return _PLANCK_NUMERATOR / ((l ** 5) * (math.e ** (self._exponent_factor / l) - 1))
 
 
 class PlottedMagnitudeFunction(PlottedFunction):
     """
-    Function to plot magnitude of star in specific wave band. Uses UBVR wavebands.
+    Function to plot magnitude of star in specific wave band of a band system. Uses UBVRI wavebands by default.
     """
 
-    def __init__(self, radius, distance, wave_band="u"):
+    def __init__(self, radius, distance, wave_band="u", band_system=band_systems.DEFAULT_BAND_SYSTEM):
+        """
+        :type radius: int, float
+        :param radius: Radius of star in meters.
+        :type distance: int, float
+        :param distance: Distance of star from observer in meters.
+        :type wave_band: str
+        :param wave_band: Wave band (eg. u, b, v, r or i) to get magnitude within.
+        :type band_system: str, BandSystem
+        :param band_system: Band system containing wave band, or name of registered band system.
+        :raises: ValueError
+        """
+        self._set_parameters(radius, distance, wave_band, band_system)
+
+    def _set_parameters(self, radius, distance, wave_band, band_system):
         """
+        Sets every parameter of the function at once, and resolves all but temperature into the constants of each call.
+        Nothing is changed if the wave band cannot be found in the band system.
+
         :type radius: int, float
         :param radius: Radius of star in meters.
         :type distance: int, float
         :param distance: Distance of star from observer in meters.
         :type wave_band: str
-        :param wave_band: Wave band (u, v, b or r) to get magnitude within.
+        :param wave_band: Wave band to get magnitude within.
+        :type band_system: str, BandSystem
+        :param band_system: Band system containing wave band, or name of registered band system.
+        :raises: ValueError
+        """
+        system = band_systems.get_band_system(band_system)
+        band_index = system.index(wave_band)
+        self._offset, self._exponent_factor = system.get_magnitude_constants(band_index, radius, distance)
+        self._radius = radius
+        self._distance = distance
+        self._wave_band = wave_band
+        # The system itself is kept for setters, as it need not be registered under its name.
+        self._system = system
+        self._band_system = system.name
+        self._band_index = band_index
+
+    def _get_key_parameters(self):
+        """
+        The band system is identified by its name, as its constants for the wave band are already parameters.
+
+        :rtype: dict
+        :returns: Attributes of function, except the band system itself.
+        """
+        return dict((name, value) for name, value in vars(self).items() if name != "_system")
+
+    @property
+    def radius(self):
+        """
+        Radius of star in meters.
         """
-        self.radius = radius
-        self.distance = distance
-        self.wave_band = wave_band
+        return self._radius
+
+    @radius.setter
+    def radius(self, radius):
+        self._set_parameters(radius, self._distance, self._wave_band, self._system)
+
+    @property
+    def distance(self):
+        """
+        Distance of star from observer in meters.
+        """
+        return self._distance
+
+    @distance.setter
+    def distance(self, distance):
+        self._set_parameters(self._radius, distance, self._wave_band, self._system)
+
+    @property
+    def wave_band(self):
+        """
+        Wave band to get magnitude within.
+        """
+        return self._wave_band
+
+    @wave_band.setter
+    def wave_band(self, wave_band):
+        self._set_parameters(self._radius, self._distance, wave_band, self._system)
+
+    @property
+    def band_system(self):
+        """
+        Name of band system containing wave band. May be set to a band system or the name of a registered one.
+        """
+        return self._band_system
+
+    @band_system.setter
+    def band_system(self, band_system):
+        self._set_parameters(self._radius, self._distance, self._wave_band, band_system)
 
     def __call__(self, temperature):
         """
@@ -112,16 +279,5 @@ class PlottedMagnitudeFunction(PlottedFunction):
         :param temperature: Temperature of star.
         :rtype: float
         :returns: Magnitude of star within specified wave band.
-        :raises: ValueError
         """
-        st = star.Star(self.radius, self.distance, temperature)
-        if self.wave_band == "u":
-            return st.get_u_mag()
-        elif self.wave_band == "b":
-            return st.get_b_mag()
-        elif self.wave_band == "v":
-            return st.get_v_mag()
-        elif self.wave_band == "r":
-            return st.get_r_mag()
-        else:
-            raise ValueError("Could not identify wave band")
+        return band_systems.scalar_magnitude(temperature, self._offset, self._exponent_factor)
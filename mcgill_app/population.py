@@ -0,0 +1,186 @@
+"""
+.. module:: population
+    :synopsis: Streaming synthesis of stellar populations, binned into colour-magnitude diagrams.
+
+.. moduleauthor:: Jack Romo <sharrackor@gmail.com>
+
+"""
+
+from __future__ import division
+import math
+import numpy as np
+import band_systems
+import constants
+
+
+class StellarPopulation(object):
+    """
+    A population of main sequence stars, with masses drawn from a power law initial mass function and positions
+    spread uniformly through a sphere around the observer.
+    Stars are generated in chunks, so that populations far larger than memory can be summarised.
+    """
+
+    def __init__(self, num_stars, min_mass=0.1, max_mass=100.0, imf_slope=2.35, min_distance=constants.PARSEC,
+                 max_distance=1000 * constants.PARSEC, chunk_size=10**6, seed=None):
+        """
+        :type num_stars: int
+        :param num_stars: Number of stars in population.
+        :type min_mass: float
+        :param min_mass: Lowest mass of a star (solar masses).
+        :type max_mass: float
+        :param max_mass: Highest mass of a star (solar masses).
+        :type imf_slope: float
+        :param imf_slope: Exponent alpha of initial mass function dN/dM ~ M^-alpha. Salpeter's is 2.35.
+        :type min_distance: float
+        :param min_distance: Distance of nearest possible star from observer (m).
+        :type max_distance: float
+        :param max_distance: Distance of furthest possible star from observer (m).
+        :type chunk_size: int
+        :param chunk_size: Number of stars generated at once. Bounds memory use.
+        :type seed: int
+        :param seed: Seed of random number generator. Populations with equal seeds and parameters are identical.
+        :raises: ValueError
+        """
+        if imf_slope == 1.0:
+            raise ValueError("Initial mass function slope of 1 is not supported")
+        if not 0 < min_mass < max_mass or not 0 < min_distance < max_distance:
+            raise ValueError("Mass and distance ranges must be positive and increasing")
+        self.num_stars = int(num_stars)
+        self.min_mass = min_mass
+        self.max_mass = max_mass
+        self.imf_slope = imf_slope
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.chunk_size = int(chunk_size)
+        self.seed = seed
+
+    def _sample_masses(self, random_state, size):
+        """
+        Draws masses from the initial mass function by inverting its cumulative distribution.
+
+        :type random_state: numpy.random.RandomState
+        :param random_state: Source of random numbers.
+        :type size: int
+        :param size: Number of masses to draw.
+        :rtype: numpy.ndarray
+        :returns: Masses of stars (solar masses).
+        """
+        exponent = 1.0 - self.imf_slope
+        low, high = self.min_mass ** exponent, self.max_mass ** exponent
+        return (low + (high - low) * random_state.random_sample(size)) ** (1.0 / exponent)
+
+    def _sample_distances(self, random_state, size):
+        """
+        Draws distances of stars spread uniformly through the volume between min_distance and max_distance.
+
+        :type random_state: numpy.random.RandomState
+        :param random_state: Source of random numbers.
+        :type size: int
+        :param size: Number of distances to draw.
+        :rtype: numpy.ndarray
+        :returns: Distances of stars from observer (m).
+        """
+        low, high = self.min_distance ** 3, self.max_distance ** 3
+        return (low + (high - low) * random_state.random_sample(size)) ** (1.0 / 3)
+
+    def iter_chunks(self):
+        """
+        Generates the population chunk by chunk. Radii and temperatures follow from masses through the main
+        sequence relations R ~ M^0.8 and L ~ M^3.5, with L = 4 * pi * R^2 * sigma * T^4.
+
+        :returns: Generator of 3-tuples of arrays of radii (m), distances (m) and temperatures (K) of stars.
+        """
+        random_state = np.random.RandomState(self.seed)
+        remaining = self.num_stars
+        while remaining > 0:
+            size = min(remaining, self.chunk_size)
+            remaining -= size
+            masses = self._sample_masses(random_state, size)
+            distances = self._sample_distances(random_state, size)
+            radii = constants.SOLAR_RADIUS * masses ** 0.8
+            luminosities = constants.SOLAR_LUMINOSITY * masses ** 3.5
+            temps = (luminosities / (4 * math.pi * constants.STEFAN_BOLTZMANN_CONST * radii ** 2)) ** 0.25
+            yield radii, distances, temps
+
+    def colour_magnitude_histogram(self, colour_bands=("b", "v"), magnitude_band="v",
+                                   band_system=band_systems.DEFAULT_BAND_SYSTEM, colour_range=(-0.5, 4.0),
+                                   magnitude_range=(-10.0, 30.0), bins=(300, 300)):
+        """
+        Streams the population into a colour-magnitude (HR) diagram of counts of stars.
+        Memory use depends on the number of bins and the chunk size, not on the size of the population.
+
+        :type colour_bands: tuple
+        :param colour_bands: A 2-tuple of wave bands; colour is the magnitude of the first minus the second.
+        :type magnitude_band: str
+        :param magnitude_band: Wave band of magnitudes on magnitude axis.
+        :type band_system: str, BandSystem
+        :param band_system: Band system containing all wave bands.
+        :type colour_range: tuple
+        :param colour_range: A 2-tuple of the lowest and highest colours binned.
+        :type magnitude_range: tuple
+        :param magnitude_range: A 2-tuple of the lowest and highest magnitudes binned.
+        :type bins: tuple
+        :param bins: A 2-tuple of the numbers of colour and magnitude bins.
+        :rtype: ColourMagnitudeHistogram
+        :returns: Histogram of all stars in population.
+        """
+        system = band_systems.get_band_system(band_system)
+        band_indices = [system.index(colour_bands[0]), system.index(colour_bands[1]), system.index(magnitude_band)]
+        histogram = ColourMagnitudeHistogram(colour_range, magnitude_range, bins)
+        for radii, distances, temps in self.iter_chunks():
+            mags = system.magnitudes(temps, radii, distances, band_indices=band_indices)
+            histogram.add(mags[:, 0] - mags[:, 1], mags[:, 2])
+        return histogram
+
+
+class ColourMagnitudeHistogram(object):
+    """
+    2-D histogram of counts of stars binned by colour and magnitude, which can be added to in chunks.
+    Stars outside the binned ranges are counted in out_of_range but not binned.
+    """
+
+    def __init__(self, colour_range, magnitude_range, bins):
+        """
+        :type colour_range: tuple
+        :param colour_range: A 2-tuple of the lowest and highest colours binned.
+        :type magnitude_range: tuple
+        :param magnitude_range: A 2-tuple of the lowest and highest magnitudes binned.
+        :type bins: tuple
+        :param bins: A 2-tuple of the numbers of colour and magnitude bins.
+        """
+        self.colour_range = tuple(colour_range)
+        self.magnitude_range = tuple(magnitude_range)
+        self.bins = tuple(bins)
+        # Rows are magnitude bins and columns colour bins, as expected by FunctionsGraph.plot_heatmap.
+        self.counts = np.zeros((self.bins[1], self.bins[0]), dtype=np.int64)
+        self.out_of_range = 0
+
+    def add(self, colours, magnitudes):
+        """
+        Bins a chunk of stars into the histogram.
+
+        :type colours: numpy.ndarray
+        :param colours: Colour of each star.
+        :type magnitudes: numpy.ndarray
+        :param magnitudes: Magnitude of each star.
+        :returns: Nothing.
+        """
+        # Bins are uniform, so indices are found arithmetically rather than by searching bin edges.
+        colour_bins = np.floor((colours - self.colour_range[0]) *
+                               (self.bins[0] / (self.colour_range[1] - self.colour_range[0])))
+        magnitude_bins = np.floor((magnitudes - self.magnitude_range[0]) *
+                                  (self.bins[1] / (self.magnitude_range[1] - self.magnitude_range[0])))
+        in_range = ((colour_bins >= 0) & (colour_bins < self.bins[0]) &
+                    (magnitude_bins >= 0) & (magnitude_bins < self.bins[1]))
+        flat_bins = magnitude_bins[in_range].astype(np.intp) * self.bins[0] + colour_bins[in_range].astype(np.intp)
+        self.counts += np.bincount(flat_bins, minlength=self.counts.size).reshape(self.counts.shape)
+        self.out_of_range += len(colours) - len(flat_bins)
+
+    def get_bin_centres(self):
+        """
+        :returns: Two arrays, of the centres of colour bins and of magnitude bins.
+        """
+        colour_width = (self.colour_range[1] - self.colour_range[0]) / self.bins[0]
+        magnitude_width = (self.magnitude_range[1] - self.magnitude_range[0]) / self.bins[1]
+        return (self.colour_range[0] + colour_width * (np.arange(self.bins[0]) + 0.5),
+                self.magnitude_range[0] + magnitude_width * (np.arange(self.bins[1]) + 0.5))
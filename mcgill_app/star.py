@@ -6,9 +6,7 @@
 """
 
 from __future__ import division
-import constants
-import math
-import plotted_functions as pf
+import band_systems
 
 
 class Star(object):
@@ -29,41 +27,51 @@ class Star(object):
         self.dist = dist
         self.surface_temp = surface_temp
 
-    def _get_wavelength_magnitude(self, wavelength, zero_point_flux):
+    def _get_band_magnitude(self, band, band_system=band_systems.DEFAULT_BAND_SYSTEM):
         """
-        Gets absolute magnitude of the star within a certain wavelength.
+        Gets magnitude of the star within a single wave band.
 
-        :type wavelength: float
-        :param wavelength: Wavelength to get magnitude of star within (m).
-        :type zero_point_flux: float
-        :param zero_point_flux: Flux in wavelength of reference star with zero magnitude (ie. Vega).
+        :type band: str
+        :param band: Name of wave band within band system.
+        :type band_system: str, BandSystem
+        :param band_system: Band system containing wave band.
         :rtype: float
         :returns: Magnitude of self.
         """
-        flux = pf.PlottedPlanckFunction(self.surface_temp)(wavelength)
-        # Get ratio of own flux to Vega's flux, ie. a reference point.
-        return -2.5 * math.log(flux / zero_point_flux, 10)
+        system = band_systems.get_band_system(band_system)
+        return system.magnitude(self.surface_temp, system.index(band), self.radius, self.dist)
+
+    def get_mags(self, band_system=band_systems.DEFAULT_BAND_SYSTEM):
+        """
+        Gets magnitudes of the star within every wave band of a band system in a single pass.
+
+        :type band_system: str, BandSystem
+        :param band_system: Name of registered band system, eg. "johnson_cousins", "sdss" or "2mass".
+        :rtype: numpy.ndarray
+        :returns: Magnitude of star in each wave band, in the order of the band system's band_names.
+        """
+        return band_systems.get_band_system(band_system).magnitudes(self.surface_temp, self.radius, self.dist)
 
     def get_u_mag(self):
         """
         :returns: U magnitude of star.
         """
-        return self._get_wavelength_magnitude(constants.U_WAVELENGTH, constants.VEGA_U_FLUX)
+        return self._get_band_magnitude("u")
 
     def get_b_mag(self):
         """
         :returns: B magnitude of star.
         """
-        return self._get_wavelength_magnitude(constants.B_WAVELENGTH, constants.VEGA_B_FLUX)
+        return self._get_band_magnitude("b")
 
     def get_v_mag(self):
         """
         :returns: V magnitude of star.
         """
-        return self._get_wavelength_magnitude(constants.V_WAVELENGTH, constants.VEGA_V_FLUX)
+        return self._get_band_magnitude("v")
 
     def get_r_mag(self):
         """
         :returns: R magnitude of star.
         """
-        return self._get_wavelength_magnitude(constants.R_WAVELENGTH, constants.VEGA_R_FLUX)
+        return self._get_band_magnitude("r")
@@ -0,0 +1,246 @@
+"""
+.. module:: uncertainty
+    :synopsis: Monte Carlo propagation of measurement errors in stars into uncertainties of their magnitudes.
+
+.. moduleauthor:: Jack Romo <sharrackor@gmail.com>
+
+"""
+
+from __future__ import division
+import multiprocessing
+import numpy as np
+import band_systems
+
+
+class StreamingStatistics(object):
+    """
+    Running mean, variance and quantiles of many independent quantities, eg. magnitudes of each star in each band,
+    updated a chunk of samples at a time without keeping the samples.
+    Quantiles are estimated from a fixed histogram of each quantity, so are accurate to within a bin width;
+    samples outside the histogram range are counted in its first or last bin.
+    Statistics of separate chunks can be merged, so chunks may be processed in any order or in other processes.
+    """
+
+    def __init__(self, lower_edges, upper_edges, num_bins=256):
+        """
+        :type lower_edges: numpy.ndarray
+        :param lower_edges: Lowest value binned for each quantity. Its shape is the shape of the quantities.
+        :type upper_edges: numpy.ndarray
+        :param upper_edges: Highest value binned for each quantity.
+        :type num_bins: int
+        :param num_bins: Number of histogram bins of each quantity.
+        """
+        self.lower_edges = np.asarray(lower_edges, dtype=np.float64)
+        self.upper_edges = np.asarray(upper_edges, dtype=np.float64)
+        self.num_bins = num_bins
+        self.shape = self.lower_edges.shape
+        self.counts = np.zeros(self.shape, dtype=np.int64)
+        self.means = np.zeros(self.shape)
+        # Sum of squared differences from mean, as in Welford's algorithm.
+        self.squared_deviations = np.zeros(self.shape)
+        self.histograms = np.zeros(self.shape + (num_bins,), dtype=np.int64)
+
+    def add(self, samples):
+        """
+        Adds a chunk of samples to the statistics. NaN samples are ignored.
+
+        :type samples: numpy.ndarray
+        :param samples: Array of shape (number of samples,) + shape of quantities.
+        :returns: Nothing.
+        """
+        valid = ~np.isnan(samples)
+        counts = valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, np.nansum(samples, axis=0) / counts, 0.0)
+        squared_deviations = np.nansum((samples - means) ** 2, axis=0)
+        self._combine(counts, means, squared_deviations)
+        # Histogram every quantity at once by offsetting each quantity's bins into one flat array.
+        scale = self.num_bins / (self.upper_edges - self.lower_edges)
+        bins = np.clip(np.floor((samples - self.lower_edges) * scale), 0, self.num_bins - 1)
+        offsets = np.arange(self.lower_edges.size).reshape(self.shape) * self.num_bins
+        flat_bins = (bins[valid].astype(np.intp) + np.broadcast_to(offsets, samples.shape)[valid])
+        self.histograms += np.bincount(flat_bins, minlength=self.histograms.size).reshape(self.histograms.shape)
+
+    def merge(self, other):
+        """
+        Adds all samples summarised by other statistics, which must have the same histogram edges.
+
+        :type other: StreamingStatistics
+        :param other: Statistics to merge into self.
+        :returns: Nothing.
+        :raises: ValueError
+        """
+        if (other.num_bins != self.num_bins or not np.array_equal(other.lower_edges, self.lower_edges) or
+                not np.array_equal(other.upper_edges, self.upper_edges)):
+            raise ValueError("Cannot merge statistics with different histogram edges")
+        self._combine(other.counts, other.means, other.squared_deviations)
+        self.histograms += other.histograms
+
+    def _combine(self, counts, means, squared_deviations):
+        """
+        Combines running mean and squared deviations with those of another set of samples (Chan et al.).
+
+        :type counts: numpy.ndarray
+        :param counts: Number of other samples of each quantity.
+        :type means: numpy.ndarray
+        :param means: Mean of other samples of each quantity.
+        :type squared_deviations: numpy.ndarray
+        :param squared_deviations: Sum of squared differences from mean of other samples of each quantity.
+        :returns: Nothing.
+        """
+        total_counts = self.counts + counts
+        safe_counts = np.maximum(total_counts, 1)
+        deltas = means - self.means
+        self.means = self.means + deltas * counts / safe_counts
+        self.squared_deviations = (self.squared_deviations + squared_deviations +
+                                   deltas ** 2 * self.counts * counts / safe_counts)
+        self.counts = total_counts
+
+    def get_variances(self):
+        """
+        :rtype: numpy.ndarray
+        :returns: Sample variance of each quantity. NaN where fewer than two samples were added.
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.counts > 1, self.squared_deviations / (self.counts - 1), np.nan)
+
+    def get_standard_deviations(self):
+        """
+        :rtype: numpy.ndarray
+        :returns: Sample standard deviation of each quantity.
+        """
+        return np.sqrt(self.get_variances())
+
+    def get_quantile(self, q):
+        """
+        Estimates a quantile of each quantity, interpolating linearly within histogram bins.
+
+        :type q: float
+        :param q: Fraction of samples below the quantile, between 0 and 1.
+        :rtype: numpy.ndarray
+        :returns: Estimated quantile of each quantity.
+        """
+        cumulative = np.cumsum(self.histograms, axis=-1)
+        targets = q * self.counts[..., np.newaxis]
+        bins = np.minimum(np.sum(cumulative < targets, axis=-1, keepdims=True), self.num_bins - 1)
+        below = np.take_along_axis(cumulative, bins, axis=-1) - np.take_along_axis(self.histograms, bins, axis=-1)
+        in_bin = np.take_along_axis(self.histograms, bins, axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fraction = np.where(in_bin > 0, (targets - below) / in_bin, 0.5)
+        width = (self.upper_edges - self.lower_edges) / self.num_bins
+        return self.lower_edges + width * (bins[..., 0] + fraction[..., 0])
+
+
+def _sample_magnitudes(parameters, errors, band_system, num_samples, seed, chunk_index):
+    """
+    Draws one chunk of magnitudes of stars whose temperatures, radii and distances have normal errors.
+    Draws of temperature, radius or distance below zero are unphysical, and give NaN magnitudes.
+
+    :type parameters: numpy.ndarray
+    :param parameters: Array of shape (3, number of stars) of temperatures (K), radii (m) and distances (m).
+    :type errors: numpy.ndarray
+    :param errors: Array of shape (3, number of stars) of standard errors of parameters.
+    :type band_system: BandSystem
+    :param band_system: Band system to get magnitudes within.
+    :type num_samples: int
+    :param num_samples: Number of samples of each star to draw.
+    :type seed: int
+    :param seed: Seed of whole propagation.
+    :type chunk_index: int
+    :param chunk_index: Index of chunk; each chunk has its own random stream derived from seed.
+    :rtype: numpy.ndarray
+    :returns: Array of shape (num_samples, number of stars, number of bands) of magnitudes.
+    """
+    random_state = np.random.RandomState([seed, chunk_index])
+    draws = parameters + errors * random_state.standard_normal((num_samples,) + parameters.shape)
+    draws[draws <= 0] = np.nan
+    with np.errstate(invalid="ignore"):
+        return band_system.magnitudes(draws[:, 0], draws[:, 1], draws[:, 2])
+
+
+def _chunk_statistics(args):
+    """
+    Summarises one chunk of sampled magnitudes. Module level so that it can be run in other processes.
+
+    :type args: tuple
+    :param args: Arguments of _sample_magnitudes, followed by lower and upper histogram edges and number of bins.
+    :rtype: StreamingStatistics
+    :returns: Statistics of chunk.
+    """
+    lower_edges, upper_edges, num_bins = args[-3:]
+    statistics = StreamingStatistics(lower_edges, upper_edges, num_bins)
+    statistics.add(_sample_magnitudes(*args[:-3]))
+    return statistics
+
+
+def propagate_magnitude_uncertainties(temperatures, radii, distances, temperature_errors=0.0, radius_errors=0.0,
+                                      distance_errors=0.0, band_system=band_systems.DEFAULT_BAND_SYSTEM,
+                                      num_samples=10000, chunk_size=1000, num_bins=256, seed=None, processes=1):
+    """
+    Propagates normal measurement errors in temperature, radius and distance of stars into their magnitudes
+    in every band of a band system, by Monte Carlo sampling.
+    Samples are drawn and summarised in chunks and never stored, so memory does not grow with num_samples.
+    Each chunk has its own random stream derived from seed, so results do not depend on the number of processes.
+
+    :type temperatures: list, numpy.ndarray
+    :param temperatures: Measured temperature of each star (K).
+    :type radii: list, numpy.ndarray
+    :param radii: Measured radius of each star (m).
+    :type distances: list, numpy.ndarray
+    :param distances: Measured distance of each star (m).
+    :type temperature_errors: float, numpy.ndarray
+    :param temperature_errors: Standard error of temperature of each star (K).
+    :type radius_errors: float, numpy.ndarray
+    :param radius_errors: Standard error of radius of each star (m).
+    :type distance_errors: float, numpy.ndarray
+    :param distance_errors: Standard error of distance of each star (m).
+    :type band_system: str, BandSystem
+    :param band_system: Band system to get magnitudes within.
+    :type num_samples: int
+    :param num_samples: Number of samples of each star.
+    :type chunk_size: int
+    :param chunk_size: Number of samples of each star drawn at once.
+    :type num_bins: int
+    :param num_bins: Number of histogram bins used to estimate quantiles of each magnitude.
+    :type seed: int
+    :param seed: Seed of random number generator. Equal seeds give equal results.
+    :type processes: int
+    :param processes: Number of processes to sample chunks in.
+    :rtype: StreamingStatistics
+    :returns: Statistics of magnitudes, of shape (number of stars, number of bands).
+    :raises: ValueError
+    """
+    if num_samples < 1 or chunk_size < 1:
+        raise ValueError("Number of samples and chunk size must be positive")
+    system = band_systems.get_band_system(band_system)
+    parameters = np.array(np.broadcast_arrays(temperatures, radii, distances), dtype=np.float64)
+    errors = np.array(np.broadcast_arrays(temperature_errors, radius_errors, distance_errors, parameters[0]),
+                      dtype=np.float64)[:3]
+    if seed is None:
+        seed = np.random.randint(2 ** 31)
+    chunk_sizes = [chunk_size] * (num_samples // chunk_size)
+    if num_samples % chunk_size:
+        chunk_sizes.append(num_samples % chunk_size)
+    # First chunk sets the histogram range of each magnitude, so that all other chunks share its edges.
+    first_chunk = _sample_magnitudes(parameters, errors, system, chunk_sizes[0], seed, 0)
+    with np.errstate(invalid="ignore"):
+        centres = np.nan_to_num(np.nanmedian(first_chunk, axis=0))
+        half_widths = np.maximum(8 * np.nan_to_num(np.nanstd(first_chunk, axis=0)), 1e-6)
+    lower_edges, upper_edges = centres - half_widths, centres + half_widths
+    statistics = StreamingStatistics(lower_edges, upper_edges, num_bins)
+    statistics.add(first_chunk)
+    tasks = [(parameters, errors, system, size, seed, i, lower_edges, upper_edges, num_bins)
+             for i, size in enumerate(chunk_sizes) if i > 0]
+    if processes > 1 and tasks:
+        pool = multiprocessing.Pool(processes)
+        try:
+            chunk_statistics = pool.imap(_chunk_statistics, tasks)
+            for chunk in chunk_statistics:
+                statistics.merge(chunk)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for task in tasks:
+            statistics.merge(_chunk_statistics(task))
+    return statistics
@@ -0,0 +1,10 @@
+"""
+.. module:: version
+    :synopsis: Version of package.
+
+.. moduleauthor:: Jack Romo <sharrackor@gmail.com>
+
+"""
+
+__version__ = "1.0.0"
+"""Version of package, kept in step with setup.py. Part of every disk cache key."""
@@ -16,6 +16,8 @@ setup(
     },
     install_requires=[
         "matplotlib>=1.5.1",
+        "numpy>=1.15",
+        "Pillow>=3.0",
         "sphinx>=1.3.6"
     ],
     classifiers=[
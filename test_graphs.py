@@ -1,9 +1,44 @@
+import os
+import shutil
+import tempfile
 import unittest
 from mcgill_app.graphs import *
 from mcgill_app.plotted_functions import *
 import mcgill_app.constants as constants
 
 
+class CountingPlottedFunction(PlottedFunction):
+    """
+    A dummy PlottedFunction that counts how many times it has been evaluated, to be used solely for testing.
+    """
+
+    def __init__(self, gradient):
+        self.gradient = gradient
+        self.calls = 0
+
+    def get_cache_key(self):
+        return type(self), self.gradient
+
+    def __call__(self, x):
+        self.calls += 1
+        return self.gradient * x
+
+
+class CountingListPlottedFunction(PlottedFunction):
+    """
+    A dummy PlottedFunction with an unhashable parameter, which counts how many times it has been evaluated,
+    to be used solely for testing.
+    """
+
+    def __init__(self, coefficients):
+        self.coefficients = coefficients
+        self.calls = 0
+
+    def __call__(self, x):
+        self.calls += 1
+        return sum(coefficient * x ** i for i, coefficient in enumerate(self.coefficients))
+
+
 class FunctionsGraphTester(unittest.TestCase):
     """
     Cannot test in normal fashion, as FunctionsGraph plots output graphically.
@@ -20,6 +55,73 @@ class FunctionsGraphTester(unittest.TestCase):
     def test_plot(self):
         self.graph.plot((1000, 10000), 100)
 
+    def test_plot_reuses_evaluations(self):
+        graph = FunctionsGraph()
+        func1 = CountingPlottedFunction(1.0)
+        graph.add_plotted_function(func1)
+        graph.plot((0, 10), 1.0)
+        self.assertEqual(func1.calls, 11)
+        # Adding a function or changing units only evaluates the new function.
+        func2 = CountingPlottedFunction(2.0)
+        graph.add_plotted_function(func2)
+        graph.plot((0, 10), 1.0, unit_factor_x=10.0, unit_factor_y=0.5)
+        self.assertEqual((func1.calls, func2.calls), (11, 11))
+        # Changing parameters or range re-evaluates.
+        func1.gradient = 3.0
+        graph.plot((0, 10), 1.0)
+        self.assertEqual((func1.calls, func2.calls), (22, 11))
+        graph.plot((0, 5), 1.0)
+        self.assertEqual((func1.calls, func2.calls), (28, 17))
+
+    def test_plot_reevaluates_unhashable_functions(self):
+        graph = FunctionsGraph()
+        func = CountingListPlottedFunction([0.0, 1.0])
+        graph.add_plotted_function(func)
+        graph.plot((0, 2), 1.0)
+        self.assertEqual(list(plt.gca().lines[-1].get_ydata()), [0.0, 1.0, 2.0])
+        # Parameters changed in place cannot be detected, so every plot evaluates the function again.
+        func.coefficients[1] = 5.0
+        graph.plot((0, 2), 1.0)
+        self.assertEqual(func.calls, 6)
+        self.assertEqual(list(plt.gca().lines[-1].get_ydata()), [0.0, 5.0, 10.0])
+
+    def test_plot_heatmap(self):
+        temps = [3000, 4000, 5000]
+        wavelengths = [0.2e-6 * i for i in range(1, 11)]
+        self.graph.plot_heatmap(planck_flux_grid(temps, wavelengths), wavelengths, temps, unit_factor_x=10**9)
+        self.assertRaises(ValueError, self.graph.plot_heatmap, planck_flux_grid(temps, wavelengths), temps, temps)
+
+    def test_plot_heatmap_log_scale(self):
+        counts = [[0, 1, 10], [100, 0, 1000]]
+        self.graph.plot_heatmap(counts, [0.0, 0.5, 1.0], [10.0, 20.0], log_scale=True, invert_y=True)
+
+
+class AnimatedFunctionsGraphTester(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.graph = AnimatedFunctionsGraph(x_label="wavelength / nm", y_label="flux")
+        self.temps = [3000, 4000, 5000, 6000]
+        self.wavelengths = [0.1e-6 * i for i in range(1, 31)]
+        self.graph.add_sweep(planck_flux_grid(self.temps, self.wavelengths), style="r-", label="Sweep")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_animate_gif(self):
+        from PIL import Image
+        file_name = os.path.join(self.directory, "sweep.gif")
+        self.graph.animate(file_name, self.wavelengths, frame_labels=[str(t) for t in self.temps],
+                           unit_factor_x=10**9, size=(4, 3), dpi=50)
+        with Image.open(file_name) as image:
+            self.assertEqual(image.size, (200, 150))
+            self.assertEqual(image.n_frames, len(self.temps))
+
+    def test_animate_mismatched_sweeps(self):
+        self.graph.add_sweep(planck_flux_grid(self.temps[:2], self.wavelengths))
+        self.assertRaises(ValueError, self.graph.animate, os.path.join(self.directory, "sweep.gif"),
+                          self.wavelengths)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,4 @@
+import math
 import unittest
 from mcgill_app.star import *
 import mcgill_app.constants as constants
@@ -33,6 +34,21 @@ class StarTester(unittest.TestCase):
         self.assertEqual(round(self.star2.get_r_mag(), 1), 6.4)
         self.assertEqual(round(self.star3.get_r_mag(), 1), 5.2)
 
+    def test_get_mags(self):
+        mags = self.star2.get_mags()
+        self.assertEqual([round(mag, 1) for mag in mags[:4]], [9.3, 8.1, 7.0, 6.4])
+        self.assertEqual(len(self.star2.get_mags("sdss")), 5)
+        self.assertEqual(len(self.star2.get_mags("2mass")), 3)
+        self.assertRaises(ValueError, self.star2.get_mags, "unknown")
+
+    def test_radius_and_distance(self):
+        # Ten times further away is five magnitudes fainter; twice the radius is 2.5 * log10(4) brighter.
+        far_star = Star(constants.SOLAR_RADIUS, 100 * constants.PARSEC, 4000)
+        big_star = Star(2 * constants.SOLAR_RADIUS, 10 * constants.PARSEC, 4000)
+        self.assertAlmostEqual(far_star.get_v_mag() - self.star2.get_v_mag(), 5.0)
+        self.assertAlmostEqual(self.star2.get_v_mag() - big_star.get_v_mag(), 2.5 * math.log10(4))
+        self.assertAlmostEqual(far_star.get_mags()[2], far_star.get_v_mag())
+
 
 if __name__ == "__main__":
     unittest.main()
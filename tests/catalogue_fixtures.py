@@ -0,0 +1,32 @@
+import os
+import numpy as np
+from mcgill_app.catalogue import CATALOGUE_COLUMNS, open_catalogue_writer
+import mcgill_app.constants as constants
+
+
+def write_random_catalogue(directory, num_stars, chunk_size=None):
+    """
+    Writes the same random stars to a CSV catalogue and a binary catalogue in a directory.
+
+    :type directory: str
+    :param directory: Directory to write both catalogues into.
+    :type num_stars: int
+    :param num_stars: Number of stars in each catalogue.
+    :type chunk_size: int
+    :param chunk_size: Number of stars per write, so that catalogues are written in several chunks. All at once if None.
+    :rtype: tuple
+    :returns: Arrays of radii (m), distances (m) and temperatures (K), then paths of CSV and binary catalogues.
+    """
+    random_state = np.random.RandomState(0)
+    radii = random_state.uniform(0.1, 10, num_stars) * constants.SOLAR_RADIUS
+    distances = random_state.uniform(1, 1000, num_stars) * constants.PARSEC
+    temps = random_state.uniform(2000, 40000, num_stars)
+    csv_path = os.path.join(directory, "stars.csv")
+    binary_path = os.path.join(directory, "stars")
+    chunk_size = chunk_size or num_stars
+    for path in [csv_path, binary_path]:
+        with open_catalogue_writer(path, CATALOGUE_COLUMNS) as writer:
+            for start in range(0, num_stars, chunk_size):
+                writer.write(radii[start:start + chunk_size], distances[start:start + chunk_size],
+                             temps[start:start + chunk_size])
+    return radii, distances, temps, csv_path, binary_path
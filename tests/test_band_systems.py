@@ -0,0 +1,90 @@
+import unittest
+from mcgill_app.band_systems import *
+import mcgill_app.band_systems as band_systems
+import mcgill_app.constants as constants
+
+
+class BandSystemTester(unittest.TestCase):
+
+    def setUp(self):
+        self.system = BandSystem("test", ["x", "y"], [constants.U_WAVELENGTH, constants.V_WAVELENGTH],
+                                 [constants.VEGA_U_FLUX, constants.VEGA_V_FLUX])
+
+    def test_init(self):
+        self.assertRaises(ValueError, BandSystem, "bad", ["x", "y"], [1e-6], [1.0, 1.0])
+
+    def test_index(self):
+        self.assertEqual(self.system.index("x"), 0)
+        self.assertEqual(self.system.index("y"), 1)
+        self.assertRaises(ValueError, self.system.index, "z")
+
+    def test_magnitude(self):
+        self.assertEqual(round(self.system.magnitude(4000, 0), 1), 9.3)
+        self.assertEqual(round(self.system.magnitude(4000, 1), 1), 7.0)
+
+    def test_magnitudes(self):
+        mags = self.system.magnitudes([3000, 4000, 5000])
+        self.assertEqual(mags.shape, (3, 2))
+        for i, temp in enumerate([3000, 4000, 5000]):
+            for j in range(2):
+                self.assertAlmostEqual(mags[i, j], self.system.magnitude(temp, j), places=9)
+
+    def test_magnitudes_of_cold_black_body(self):
+        mags = self.system.magnitudes([1.0, 10.0])
+        self.assertTrue(np.all(np.isfinite(mags)))
+        self.assertAlmostEqual(mags[0, 0], self.system.magnitude(1.0, 0), places=6)
+
+    def test_scalar_magnitude(self):
+        offset, exponent_factor = self.system.get_magnitude_constants(1, 2 * constants.SOLAR_RADIUS, constants.PARSEC)
+        for temp in [10.0, 3000.0, 1e5]:
+            mag = scalar_magnitude(temp, offset, exponent_factor)
+            self.assertIs(type(mag), float)
+            self.assertAlmostEqual(mag, self.system.magnitudes(temp, 2 * constants.SOLAR_RADIUS, constants.PARSEC)[1],
+                                   places=9)
+            self.assertEqual(mag, self.system.magnitude(temp, 1, 2 * constants.SOLAR_RADIUS, constants.PARSEC))
+
+    def test_magnitudes_in_bands(self):
+        temps = np.array([[3000.0, 6000.0, 12000.0], [4000.0, 8000.0, 20000.0]])
+        band_indices = np.array([0, 1, 1])
+        mags = self.system.magnitudes_in_bands(temps, band_indices, 2 * constants.SOLAR_RADIUS, constants.PARSEC)
+        all_mags = self.system.magnitudes(temps, 2 * constants.SOLAR_RADIUS, constants.PARSEC)
+        self.assertEqual(mags.shape, temps.shape)
+        self.assertTrue(np.allclose(mags, all_mags[:, np.arange(3), band_indices]))
+
+
+class BandSystemRegistryTester(unittest.TestCase):
+
+    def test_builtin_systems(self):
+        self.assertEqual(band_system_names(), ["2mass", "johnson_cousins", "sdss"])
+        self.assertEqual(get_band_system("sdss").band_names, ("u", "g", "r", "i", "z"))
+        self.assertEqual(get_band_system("2mass").band_names, ("j", "h", "ks"))
+
+    def test_register_band_system(self):
+        system = BandSystem("custom", ["x"], [1e-6], [1e15])
+        register_band_system(system)
+        try:
+            self.assertIs(get_band_system("custom"), system)
+            self.assertIs(get_band_system(system), system)
+        finally:
+            del band_systems._band_systems["custom"]
+        self.assertRaises(ValueError, get_band_system, "custom")
+
+    def test_vega_zero_point_fluxes(self):
+        # Model of Vega agrees with UBVR zero points to within 0.05 magnitudes.
+        fluxes = vega_zero_point_fluxes([constants.U_WAVELENGTH, constants.R_WAVELENGTH])
+        self.assertLess(abs(2.5 * np.log10(fluxes[0] / constants.VEGA_U_FLUX)), 0.05)
+        self.assertLess(abs(2.5 * np.log10(fluxes[1] / constants.VEGA_R_FLUX)), 0.05)
+
+    def test_ab_zero_point_fluxes(self):
+        # Vega's V magnitude is close to zero on the AB system as well.
+        flux = ab_zero_point_fluxes([constants.V_WAVELENGTH])[0]
+        self.assertLess(abs(2.5 * np.log10(flux / constants.VEGA_V_FLUX)), 0.1)
+        # Flat flux density per unit frequency falls as 1 / l^2 per unit wavelength.
+        fluxes = ab_zero_point_fluxes([1e-6, 2e-6])
+        self.assertAlmostEqual(fluxes[0] / fluxes[1], 4.0)
+        sdss = get_band_system("sdss")
+        self.assertTrue(np.allclose(sdss.zero_point_fluxes, ab_zero_point_fluxes(sdss.wavelengths)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import numpy as np
+from mcgill_app.batch_jobs import *
+from mcgill_app.catalogue import read_catalogue
+from mcgill_app.star import Star
+from tests.catalogue_fixtures import write_random_catalogue
+
+
+class BatchJobTester(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.radii, self.distances, self.temps, self.csv_path, self.binary_path = write_random_catalogue(
+            self.directory, 5000)
+        self.job_directory = os.path.join(self.directory, "job")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_merged(self, output_name, bands=("u", "v")):
+        output_path = os.path.join(self.directory, output_name)
+        self.assertEqual(merge_job_outputs(self.job_directory, output_path), 5000)
+        mags = np.concatenate(list(read_catalogue(output_path, bands)), axis=1)
+        for i in [0, 1234, 4999]:
+            star_mags = Star(self.radii[i], self.distances[i], self.temps[i]).get_mags()
+            self.assertTrue(np.allclose(mags[:, i], [star_mags[0], star_mags[2]]))
+
+    def test_single_worker(self):
+        self.assertEqual(create_job(self.job_directory, self.binary_path, shard_size=1000, chunk_size=300), 5)
+        self.assertEqual(get_job_status(self.job_directory), {"queue": 5, "running": 0, "done": 0, "failed": 0})
+        self.assertRaises(ValueError, merge_job_outputs, self.job_directory, os.path.join(self.directory, "out"))
+        self.assertEqual(run_worker(self.job_directory), 5)
+        self.assertEqual(get_job_status(self.job_directory), {"queue": 0, "running": 0, "done": 5, "failed": 0})
+        self.assert_merged("mags")
+        self.assert_merged("mags.csv")
+        # Completed shards are checkpointed, so a restarted worker has nothing to do.
+        self.assertEqual(run_worker(self.job_directory), 0)
+
+    def test_local_workers(self):
+        create_job(self.job_directory, self.csv_path, bands=["u", "v"], shard_size=200)
+        num_shards = len(load_job(self.job_directory)["shards"])
+        self.assertGreater(num_shards, 10)
+        status = run_local_workers(self.job_directory, processes=4)
+        self.assertEqual(status, {"queue": 0, "running": 0, "done": num_shards, "failed": 0})
+        self.assertEqual(sorted(os.listdir(os.path.join(self.job_directory, "outputs", "000000"))), ["u.f8", "v.f8"])
+        self.assert_merged("mags")
+
+    def test_stale_shard_retried(self):
+        create_job(self.job_directory, self.binary_path, shard_size=2500)
+        # A worker claimed the first shard, then died.
+        claim = os.path.join(self.job_directory, "running", "000000.0.dead-worker")
+        os.rename(os.path.join(self.job_directory, "queue", "000000.0"), claim)
+        os.utime(claim, (time.time() - 100, time.time() - 100))
+        self.assertEqual(run_worker(self.job_directory, stale_timeout=1000), 1)
+        self.assertEqual(get_job_status(self.job_directory)["running"], 1)
+        self.assertEqual(run_worker(self.job_directory, stale_timeout=10), 1)
+        self.assertEqual(get_job_status(self.job_directory), {"queue": 0, "running": 0, "done": 2, "failed": 0})
+        self.assertTrue(os.path.exists(os.path.join(self.job_directory, "errors", "000000.0.txt")))
+        self.assert_merged("mags")
+
+    def test_failed_shard(self):
+        with open(self.csv_path, "a") as csv_file:
+            csv_file.write("1,2,three\n")
+        create_job(self.job_directory, self.csv_path, shard_size=1000, max_attempts=2)
+        num_shards = len(load_job(self.job_directory)["shards"])
+        self.assertEqual(run_worker(self.job_directory), num_shards - 1)
+        self.assertEqual(get_job_status(self.job_directory)["failed"], 1)
+        last_shard = "{0:06d}".format(num_shards - 1)
+        self.assertEqual(os.listdir(os.path.join(self.job_directory, "failed")), [last_shard + ".2"])
+        errors = sorted(os.listdir(os.path.join(self.job_directory, "errors")))
+        self.assertEqual(errors, [last_shard + ".0.txt", last_shard + ".1.txt"])
+        with open(os.path.join(self.job_directory, "errors", errors[0])) as error_file:
+            self.assertIn("ValueError", error_file.read())
+        self.assertRaises(ValueError, merge_job_outputs, self.job_directory, os.path.join(self.directory, "out"))
+
+    def test_invalid_jobs(self):
+        self.assertRaises(ValueError, create_job, self.job_directory, self.binary_path, bands=["q"])
+        self.assertRaises(ValueError, load_job, self.job_directory)
+        create_job(self.job_directory, self.binary_path)
+        self.assertRaises(ValueError, create_job, self.job_directory, self.binary_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from mcgill_app.catalogue import *
+from mcgill_app.star import Star
+from tests.catalogue_fixtures import write_random_catalogue
+
+
+class CatalogueTester(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Written in two chunks, so that writers append to existing catalogues.
+        self.radii, self.distances, self.temps, self.csv_path, self.binary_path = write_random_catalogue(
+            self.directory, 1000, chunk_size=600)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_round_trip(self, chunks, min_chunks):
+        chunks = list(chunks)
+        self.assertGreaterEqual(len(chunks), min_chunks)
+        for values, expected in zip(zip(*chunks), [self.radii, self.distances, self.temps]):
+            self.assertTrue(np.array_equal(np.concatenate(values), expected))
+
+    def test_csv_round_trip(self):
+        with open(self.csv_path) as csv_file:
+            self.assertEqual(csv_file.readline(), "radius,distance,temperature\n")
+        # Small blocks split rows across reads.
+        self.assert_round_trip(read_csv_chunks(self.csv_path, chunk_bytes=1000), 10)
+        self.assert_round_trip(read_catalogue(self.csv_path), 1)
+
+    def test_binary_round_trip(self):
+        self.assertEqual(os.path.getsize(os.path.join(self.binary_path, "radius.f8")), 8000)
+        self.assert_round_trip(read_binary_chunks(self.binary_path, chunk_size=300), 4)
+        self.assert_round_trip(read_catalogue(self.binary_path), 1)
+
+    def test_column_selection(self):
+        chunks = list(read_csv_chunks(self.csv_path, ("temperature", "radius")))
+        self.assertTrue(np.array_equal(chunks[0][0], self.temps))
+        self.assertTrue(np.array_equal(chunks[0][1], self.radii))
+
+    def test_invalid_catalogues(self):
+        self.assertRaises(ValueError, list, read_csv_chunks(self.csv_path, ("mass",)))
+        self.assertRaises(ValueError, list, read_binary_chunks(self.binary_path, ("mass",)))
+        bad_path = os.path.join(self.directory, "bad.csv")
+        with open(bad_path, "w") as bad_file:
+            bad_file.write("radius,distance,temperature\n1,2,3\n4,five,6\n")
+        self.assertRaises(ValueError, list, read_csv_chunks(bad_path))
+        with open(bad_path, "w") as bad_file:
+            bad_file.write("radius,distance,temperature\n1,2,3\n4,5\n")
+        self.assertRaises(ValueError, list, read_csv_chunks(bad_path))
+
+    def test_csv_without_final_newline(self):
+        path = os.path.join(self.directory, "short.csv")
+        with open(path, "w") as csv_file:
+            csv_file.write("temperature, radius ,distance\r\n1,2,3\r\n4,5,6")
+        radii, _, temps = np.concatenate(list(read_csv_chunks(path)), axis=1)
+        self.assertTrue(np.array_equal(radii, [2, 5]))
+        self.assertTrue(np.array_equal(temps, [1, 4]))
+
+    def test_compute_catalogue_magnitudes(self):
+        for input_path in [self.csv_path, self.binary_path]:
+            for output_name in ["mags.csv", "mags"]:
+                output_path = os.path.join(self.directory, output_name)
+                self.assertEqual(compute_catalogue_magnitudes(input_path, output_path, chunk_size=256), 1000)
+                u_mags, v_mags = np.concatenate(list(read_catalogue(output_path, ("u", "v"))), axis=1)
+                star = Star(self.radii[7], self.distances[7], self.temps[7])
+                self.assertAlmostEqual(u_mags[7], star.get_u_mag())
+                self.assertAlmostEqual(v_mags[7], star.get_v_mag())
+        output_path = os.path.join(self.directory, "ks_mags")
+        compute_catalogue_magnitudes(self.binary_path, output_path, "2mass", ["ks"])
+        self.assertEqual(os.listdir(output_path), ["ks.f8"])
+
+
+if __name__ == "__main__":
+    unittest.main()
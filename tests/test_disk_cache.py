@@ -0,0 +1,145 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import numpy as np
+from mcgill_app.disk_cache import *
+from mcgill_app.plotted_functions import PlottedPlanckFunction
+import mcgill_app.disk_cache as disk_cache
+import mcgill_app.plotted_functions as plotted_functions
+
+
+def _write_entries(directory):
+    cache = DiskCache(directory)
+    for i in range(20):
+        cache.put(cache.make_key("shared"), {"values": np.arange(1000) * i})
+
+
+class ListPlottedFunction(plotted_functions.PlottedFunction):
+    """
+    A dummy PlottedFunction with an unhashable parameter, to be used solely for testing.
+    """
+
+    def __init__(self, coefficients):
+        self.coefficients = coefficients
+
+    def __call__(self, x):
+        return sum(coefficient * x ** i for i, coefficient in enumerate(self.coefficients))
+
+
+class DiskCacheTester(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = DiskCache(os.path.join(self.directory, "cache"), max_bytes=10**6)
+
+    def tearDown(self):
+        disk_cache.disable()
+        plotted_functions.disk_cache.disable()
+        shutil.rmtree(self.directory)
+
+    def test_make_key(self):
+        self.assertEqual(DiskCache.make_key("a", 1.0, (2, 3)), DiskCache.make_key("a", 1.0, (2, 3)))
+        self.assertNotEqual(DiskCache.make_key("a", 1.0), DiskCache.make_key("a", 2.0))
+
+    def test_get_and_put(self):
+        key = self.cache.make_key("test")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, {"x": np.arange(5), "y": np.ones(5)})
+        arrays = self.cache.get(key)
+        self.assertEqual(sorted(arrays), ["x", "y"])
+        self.assertTrue(np.array_equal(arrays["x"], np.arange(5)))
+
+    def test_get_or_compute(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"values": [1.0, 2.0]}
+
+        first = self.cache.get_or_compute(("values",), compute)
+        second = self.cache.get_or_compute(("values",), compute)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(np.array_equal(first["values"], second["values"]))
+
+    def test_evicts_least_recently_used(self):
+        keys = [self.cache.make_key(i) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, {"values": np.zeros(40000)})
+            # Give each file a distinct, increasing last use time.
+            os.utime(self.cache._get_path(key), (time.time() - 100 + i, time.time() - 100 + i))
+        # Use the oldest, so the second is now least recently used.
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.cache.put(self.cache.make_key("new"), {"values": np.zeros(40000)})
+        self.assertLessEqual(self.cache.get_size(), 10**6)
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[0]))
+
+    def test_concurrent_writers(self):
+        processes = [multiprocessing.Process(target=_write_entries, args=(self.cache.directory,)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(len(self.cache.get(self.cache.make_key("shared"))["values"]), 1000)
+        self.assertEqual([name for name in os.listdir(self.cache.directory) if name.endswith(".tmp")], [])
+
+    def test_get_xy_vals_cached(self):
+        planck = PlottedPlanckFunction(3000)
+        expected = planck.get_xy_vals((1e-7, 1e-6), 1e-7)
+        plotted_functions.disk_cache.enable(self.cache.directory)
+        self.assertEqual(planck.get_xy_vals((1e-7, 1e-6), 1e-7), expected)
+        self.assertGreater(self.cache.get_size(), 0)
+        self.assertEqual(planck.get_xy_vals((1e-7, 1e-6), 1e-7), expected)
+
+    def test_enable_from_environment(self):
+        os.environ[CACHE_DIR_ENV_VAR] = self.cache.directory
+        try:
+            self.assertEqual(enable_from_environment().directory, self.cache.directory)
+            self.assertEqual(get_active_cache().directory, self.cache.directory)
+        finally:
+            del os.environ[CACHE_DIR_ENV_VAR]
+        disk_cache.disable()
+        self.assertIsNone(enable_from_environment())
+        self.assertIsNone(get_active_cache())
+
+    def test_has_stable_repr(self):
+        self.assertTrue(has_stable_repr(("a", 1, 2.0, None, [True, (3, "b")], PlottedPlanckFunction)))
+        self.assertFalse(has_stable_repr(("a", object())))
+        self.assertFalse(has_stable_repr((np.arange(3),)))
+
+    def test_unstable_keys_not_stored(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"values": [1.0, 2.0]}
+
+        for _ in range(2):
+            self.assertTrue(np.array_equal(self.cache.get_or_compute(("values", object()), compute)["values"],
+                                           [1.0, 2.0]))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.cache.get_size(), 0)
+
+    def test_unhashable_function_not_stored(self):
+        function = ListPlottedFunction([0.0, 1.0])
+        plotted_functions.disk_cache.enable(os.path.join(self.directory, "cache"))
+        self.assertIsNone(function.get_cache_key())
+        self.assertEqual(function.get_xy_vals((0, 2)), ([0, 1, 2], [0.0, 1.0, 2.0]))
+        function.coefficients[1] = 2.0
+        self.assertEqual(function.get_xy_vals((0, 2)), ([0, 1, 2], [0.0, 2.0, 4.0]))
+        self.assertEqual(os.listdir(os.path.join(self.directory, "cache")), [])
+
+    def test_magnitude_function_key_uses_band_system_name(self):
+        system = plotted_functions.band_systems.get_band_system("johnson_cousins")
+        by_name = plotted_functions.PlottedMagnitudeFunction(1e9, 1e17, "v", "johnson_cousins")
+        by_system = plotted_functions.PlottedMagnitudeFunction(1e9, 1e17, "v", system)
+        self.assertEqual(by_system.band_system, "johnson_cousins")
+        self.assertEqual(by_name.get_cache_key(), by_system.get_cache_key())
+        self.assertTrue(has_stable_repr(by_system.get_cache_key()))
+
+
+if __name__ == "__main__":
+    unittest.main()
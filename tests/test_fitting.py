@@ -0,0 +1,104 @@
+import unittest
+import numpy as np
+from mcgill_app.fitting import *
+import mcgill_app.constants as constants
+
+DAY = 86400.0
+
+
+class LightCurveTester(unittest.TestCase):
+
+    def setUp(self):
+        self.model = StaticStarModel()
+        self.parameters = np.array([[5800.0, constants.SOLAR_RADIUS, 10 * constants.PARSEC]])
+        self.bands = ["u", "b", "v", "r", "i"]
+        blank = LightCurve(np.arange(5.0), self.bands, np.zeros(5), 0.01)
+        self.magnitudes = self.model.get_magnitudes(self.parameters, blank)[0]
+        self.light_curve = LightCurve(np.arange(5.0), self.bands, self.magnitudes, 0.01)
+
+    def test_init(self):
+        self.assertEqual(len(self.light_curve), 5)
+        self.assertTrue(np.array_equal(self.light_curve.band_indices, np.arange(5)))
+        self.assertRaises(ValueError, LightCurve, [0.0], ["q"], [1.0], 0.1)
+        self.assertRaises(ValueError, LightCurve, [0.0, 1.0], ["u"], [1.0], 0.1)
+        self.assertRaises(ValueError, LightCurve, [0.0], ["u"], [1.0], 0.0)
+
+    def test_static_model_magnitudes(self):
+        from mcgill_app.star import Star
+        mags = Star(constants.SOLAR_RADIUS, 10 * constants.PARSEC, 5800.0).get_mags()
+        self.assertTrue(np.allclose(self.magnitudes, mags))
+
+    def test_get_chi_squares(self):
+        candidates = np.repeat(self.parameters, 3, axis=0)
+        candidates[1, 0] = 6000.0
+        candidates[2, 0] = -1.0
+        chi_squares = self.light_curve.get_chi_squares(self.model, candidates)
+        self.assertEqual(chi_squares.shape, (3,))
+        self.assertAlmostEqual(chi_squares[0], 0.0)
+        self.assertGreater(chi_squares[1], 0.0)
+        self.assertEqual(chi_squares[2], np.inf)
+
+
+class DifferentialEvolutionTester(unittest.TestCase):
+
+    @staticmethod
+    def objective(x):
+        return np.sum((x - [1.0, -2.0, 1e6]) ** 2 / [1.0, 1.0, 1e12], axis=1)
+
+    def test_minimises(self):
+        result = differential_evolution(self.objective, [(-5, 5), (-5, 5), (0, 1e7)], seed=0)
+        self.assertTrue(result.converged)
+        self.assertTrue(np.allclose(result.parameters, [1.0, -2.0, 1e6], rtol=1e-3, atol=1e-3))
+        self.assertEqual(result.iterations, len(result.iteration_times))
+        self.assertEqual(result.evaluations, 45 * (result.iterations + 1))
+        self.assertTrue(all(t >= 0 for t in result.iteration_times))
+
+    def test_fixed_parameter_and_seed(self):
+        bounds = [(-5, 5), (3, 3), (0, 1e7)]
+        result = differential_evolution(self.objective, bounds, seed=1, max_iterations=20)
+        self.assertEqual(result.parameters[1], 3.0)
+        self.assertFalse(result.converged)
+        self.assertEqual(result.iterations, 20)
+        repeat = differential_evolution(self.objective, bounds, seed=1, max_iterations=20)
+        self.assertTrue(np.array_equal(result.parameters, repeat.parameters))
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, differential_evolution, self.objective, [(1, 0)])
+        self.assertRaises(ValueError, differential_evolution, self.objective, [(0, 1)], population_size=3)
+
+
+class FitLightCurveTester(unittest.TestCase):
+
+    def test_fit_pulsating_star(self):
+        random_state = np.random.RandomState(0)
+        times = np.sort(random_state.uniform(0, 30 * DAY, 150))
+        bands = [["u", "b", "v", "r", "i"][i % 5] for i in range(150)]
+        model = PulsatingStarModel()
+        true = np.array([6000.0, 40 * constants.SOLAR_RADIUS, 1000 * constants.PARSEC, 0.1, 0.05, 5.4 * DAY, 0.3])
+        blank = LightCurve(times, bands, np.zeros(150), 0.01)
+        magnitudes = model.get_magnitudes(true[np.newaxis, :], blank)[0] + 0.01 * random_state.standard_normal(150)
+        light_curve = LightCurve(times, bands, magnitudes, 0.01)
+        bounds = {"temperature": (3000, 10000),
+                  "radius": (10 * constants.SOLAR_RADIUS, 100 * constants.SOLAR_RADIUS),
+                  "distance": (1000 * constants.PARSEC, 1000 * constants.PARSEC),
+                  "temperature_amplitude": (0, 0.3), "radius_amplitude": (0, 0.3),
+                  "period": (5 * DAY, 6 * DAY), "phase": (0, 1)}
+        result = fit_light_curve(light_curve, model, bounds, seed=0)
+        self.assertTrue(result.converged)
+        # Chi-square of a good fit is about the number of observations.
+        self.assertLess(result.chi_square, 2 * len(light_curve))
+        self.assertAlmostEqual(result.get_parameter("temperature") / 6000.0, 1.0, places=3)
+        self.assertAlmostEqual(result.get_parameter("period") / (5.4 * DAY), 1.0, places=3)
+        self.assertRaises(ValueError, result.get_parameter, "mass")
+
+    def test_invalid_bounds(self):
+        light_curve = LightCurve([0.0], ["v"], [5.0], 0.1)
+        bounds = {"temperature": (3000, 10000), "radius": (1e8, 1e9)}
+        self.assertRaises(ValueError, fit_light_curve, light_curve, StaticStarModel(), bounds)
+        bounds["distance"] = (1e17, 1e17)
+        bounds["mass"] = (1, 2)
+        self.assertRaises(ValueError, fit_light_curve, light_curve, StaticStarModel(), bounds)
+
+
+if __name__ == "__main__":
+    unittest.main()
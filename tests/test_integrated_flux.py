@@ -0,0 +1,85 @@
+import math
+import unittest
+import numpy as np
+from mcgill_app.integrated_flux import *
+from mcgill_app.plotted_functions import planck_flux_grid
+import mcgill_app.constants as constants
+
+
+def quadrature_radiance(temps, min_wavelength, max_wavelength, num_points=100001):
+    """
+    Integrates Planck's law numerically, by the trapezium rule on logarithmically spaced wavelengths.
+    """
+    wavelengths = np.geomspace(min_wavelength, max_wavelength, num_points)
+    fluxes = planck_flux_grid(temps, wavelengths)
+    return np.sum((fluxes[:, 1:] + fluxes[:, :-1]) * np.diff(wavelengths), axis=1) / 2
+
+
+def gauss_legendre_radiance(temp, min_wavelength, max_wavelength, num_points=200):
+    """
+    Integrates Planck's law numerically by Gauss-Legendre quadrature, accurate to double precision for narrow bands.
+    """
+    nodes, weights = np.polynomial.legendre.leggauss(num_points)
+    half_width = (max_wavelength - min_wavelength) / 2
+    wavelengths = min_wavelength + half_width * (nodes + 1)
+    return half_width * np.dot(planck_flux_grid([temp], wavelengths)[0], weights)
+
+
+class BandRadianceTester(unittest.TestCase):
+
+    def setUp(self):
+        self.temps = np.array([300.0, 3000.0, 5800.0, 30000.0, 1e6])
+
+    def assert_matches_quadrature(self, min_wavelength, max_wavelength):
+        radiances = band_radiance(self.temps, min_wavelength, max_wavelength)
+        expected = quadrature_radiance(self.temps, min_wavelength, max_wavelength)
+        for radiance, quadrature in zip(radiances, expected):
+            self.assertAlmostEqual(radiance / quadrature, 1.0, places=6)
+
+    def test_narrow_optical_band(self):
+        self.assert_matches_quadrature(constants.B_WAVELENGTH - 0.05e-6, constants.B_WAVELENGTH + 0.05e-6)
+
+    def test_wide_band(self):
+        self.assert_matches_quadrature(0.1e-6, 10e-6)
+
+    def test_rayleigh_jeans_band(self):
+        self.assert_matches_quadrature(1e-3, 1e-2)
+
+    def test_tolerance_of_narrow_bands(self):
+        # Partial integrals of narrow bands cancel almost entirely, yet the band must still meet the tolerance.
+        for temp, min_wavelength, max_wavelength in [(7000.0, 1.0273e-6, 1.0277e-6), (7000.0, 1.0e-6, 1.0001e-6),
+                                                     (300.0, 1.0e-6, 1.0001e-6), (30000.0, 1e-5, 1.0001e-5),
+                                                     (5800.0, 0.3e-6, 0.5e-6), (5000.0, 1e-7, 1e-6)]:
+            expected = gauss_legendre_radiance(temp, min_wavelength, max_wavelength)
+            for tolerance in [1e-3, 1e-6, 1e-12]:
+                radiance = band_radiance(temp, min_wavelength, max_wavelength, tolerance)
+                self.assertLessEqual(abs(radiance / expected - 1), max(tolerance, 1e-13))
+
+    def test_shape(self):
+        self.assertEqual(band_radiance(5800.0, 0.4e-6, 0.5e-6).shape, ())
+        self.assertEqual(band_radiance(np.ones((2, 3)) * 5800.0, 0.4e-6, 0.5e-6).shape, (2, 3))
+
+    def test_invalid_band(self):
+        self.assertRaises(ValueError, band_radiance, 5800.0, 0.5e-6, 0.4e-6)
+
+    def test_invalid_temperatures(self):
+        self.assertRaises(ValueError, band_radiance, 0.0, 0.4e-6, 0.5e-6)
+        self.assertRaises(ValueError, band_radiance, [5800.0, -1.0], 0.4e-6, 0.5e-6)
+        self.assertRaises(ValueError, band_flux, [np.nan], 0.4e-6, 0.5e-6)
+
+    def test_band_flux(self):
+        self.assertAlmostEqual(band_flux(5800.0, 0.4e-6, 0.5e-6) / band_radiance(5800.0, 0.4e-6, 0.5e-6), math.pi)
+
+
+class BolometricFluxTester(unittest.TestCase):
+
+    def test_bolometric_flux(self):
+        temps = np.array([1000.0, 5800.0])
+        fluxes = bolometric_flux(temps)
+        for temp, flux in zip(temps, fluxes):
+            self.assertAlmostEqual(flux / (constants.STEFAN_BOLTZMANN_CONST * temp ** 4), 1.0, places=2)
+        self.assertTrue(np.allclose(band_flux(temps, 1e-12, np.inf), fluxes, rtol=1e-12))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+from mcgill_app.planck_kernels import *
+from mcgill_app.plotted_functions import planck_flux_grid
+
+
+class PlanckKernelTester(unittest.TestCase):
+
+    def setUp(self):
+        # Exponents spanning the Rayleigh-Jeans, intermediate and Wien regimes, and the boundaries between them.
+        self.exponents = np.concatenate([np.geomspace(1e-6, 700, 20000), [0.1, 0.5, 12.0, 16.0, 80.0]])
+        self.prefactors = np.geomspace(1e10, 1e25, len(self.exponents))
+        self.exact = planck_kernel(self.prefactors, self.exponents, "exact")
+
+    def assert_within_max_error(self, accuracy, max_exponent):
+        values = planck_kernel(self.prefactors, self.exponents, accuracy)
+        checked = (self.exponents <= max_exponent) & (self.exact > 1e-37)
+        errors = np.abs(values[checked].astype(np.float64) / self.exact[checked] - 1)
+        self.assertLessEqual(errors.max(), MAX_RELATIVE_ERRORS[accuracy])
+
+    def test_exact(self):
+        self.assertTrue(np.array_equal(self.exact, self.prefactors / np.expm1(self.exponents)))
+
+    def test_fast(self):
+        self.assert_within_max_error("fast", FAST_TIER_MAX_EXPONENT)
+        self.assertEqual(planck_kernel(self.prefactors, self.exponents, "fast").dtype, np.float32)
+
+    def test_fast_beyond_single_overflow(self):
+        # Single precision holds these results, though e^x - 1 overflows it.
+        exponents = np.linspace(90, 120, 50)
+        values = planck_kernel(1e20, exponents, "fast").astype(np.float64)
+        self.assertTrue(np.allclose(values, planck_kernel(1e20, exponents), rtol=1e-7 * max(exponents), atol=0))
+
+    def test_extended_range(self):
+        values = planck_kernel(self.prefactors, self.exponents, extended_range=True)
+        self.assertTrue(np.array_equal(values[self.exponents <= EXTENDED_RANGE_MIN_EXPONENT],
+                                       self.exact[self.exponents <= EXTENDED_RANGE_MIN_EXPONENT]))
+        self.assertEqual(planck_kernel(1e25, [720.0])[0], 0.0)
+        self.assertAlmostEqual(planck_kernel(1e25, [720.0], extended_range=True)[0] / np.exp(np.log(1e25) - 720.0),
+                               1.0, places=12)
+        grid = planck_kernel(np.array([1e20, 1e25]), np.array([[1.0, 720.0], [750.0, 2.0]]), extended_range=True)
+        self.assertTrue(np.all(grid > 0))
+        self.assertAlmostEqual(grid[1, 0] / np.exp(np.log(1e20) - 750.0), 1.0, places=12)
+
+    def test_unknown_accuracy(self):
+        self.assertRaises(ValueError, planck_kernel, 1.0, [1.0], "rough")
+
+
+class PlanckFluxGridAccuracyTester(unittest.TestCase):
+
+    def test_accuracy_tiers(self):
+        # Exponents stay within FAST_TIER_MAX_EXPONENT, where every tier is within its maximum error.
+        temps = np.linspace(2000, 30000, 40)
+        wavelengths = np.geomspace(1e-7, 1e-3, 60)
+        exact = planck_flux_grid(temps, wavelengths)
+        for accuracy in ACCURACY_TIERS:
+            grid = planck_flux_grid(temps, wavelengths, accuracy)
+            self.assertEqual(grid.shape, exact.shape)
+            self.assertTrue(np.allclose(grid, exact, rtol=MAX_RELATIVE_ERRORS[accuracy], atol=0))
+
+
+if __name__ == "__main__":
+    unittest.main()
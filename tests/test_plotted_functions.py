@@ -1,5 +1,6 @@
 import unittest
 from mcgill_app.plotted_functions import *
+from mcgill_app.star import Star
 import mcgill_app.constants as constants
 
 
@@ -52,6 +53,32 @@ class PlottedPlanckFunctionTester(unittest.TestCase):
         self.assertEqual(self.planck1(1), 8.278100626956567e-12)
         self.assertEqual(self.planck2(1), 1.655626089571409e-11)
 
+    def test_get_cache_key(self):
+        self.assertEqual(self.planck1.get_cache_key(), PlottedPlanckFunction(1000).get_cache_key())
+        self.assertNotEqual(self.planck1.get_cache_key(), self.planck2.get_cache_key())
+
+    def test_set_temp(self):
+        key = self.planck1.get_cache_key()
+        self.planck1.temp = 2000
+        self.assertEqual(self.planck1(1), self.planck2(1))
+        self.assertEqual(self.planck1.get_cache_key(), self.planck2.get_cache_key())
+        self.assertNotEqual(self.planck1.get_cache_key(), key)
+
+
+class PlanckFluxGridTester(unittest.TestCase):
+
+    def test_matches_planck_function(self):
+        temps = [1000, 2000, 5000]
+        wavelengths = [0.35e-6, 1e-6, 1]
+        grid = planck_flux_grid(temps, wavelengths)
+        self.assertEqual(grid.shape, (3, 3))
+        for i, temp in enumerate(temps):
+            for j, wavelength in enumerate(wavelengths):
+                self.assertAlmostEqual(grid[i, j] / PlottedPlanckFunction(temp)(wavelength), 1.0, places=9)
+
+    def test_overflow_gives_zero_flux(self):
+        self.assertEqual(planck_flux_grid([10], [1e-9])[0, 0], 0.0)
+
 
 class PlottedMagnitudeFunctionTester(unittest.TestCase):
     """
@@ -71,6 +98,58 @@ class PlottedMagnitudeFunctionTester(unittest.TestCase):
         self.assertEqual(round(self.planck_v(4000), 1), 7.0)
         self.assertEqual(round(self.planck_r(4000), 1), 6.4)
 
+    def test_band_systems(self):
+        planck_ks = PlottedMagnitudeFunction(constants.SOLAR_RADIUS, 10 * constants.PARSEC, "ks", "2mass")
+        st = Star(constants.SOLAR_RADIUS, 10 * constants.PARSEC, 4000)
+        self.assertAlmostEqual(planck_ks(4000), st.get_mags("2mass")[2])
+        self.assertRaises(ValueError, PlottedMagnitudeFunction, constants.SOLAR_RADIUS, 10 * constants.PARSEC, "g")
+
+    def test_scalar_path(self):
+        # Scalar calls agree with the vectorized path at all temperatures, including very cool stars.
+        temps = [5.0, 300.0, 4000.0, 40000.0]
+        mags = self.planck_v.list_call(temps)
+        st_mags = [Star(constants.SOLAR_RADIUS, 10 * constants.PARSEC, temp).get_mags()[2] for temp in temps]
+        for mag, st_mag in zip(mags, st_mags):
+            self.assertIs(type(mag), float)
+            self.assertAlmostEqual(mag, st_mag, places=9)
+
+    def test_set_parameters(self):
+        key = self.planck_v.get_cache_key()
+        self.planck_v.radius = 2 * constants.SOLAR_RADIUS
+        st = Star(2 * constants.SOLAR_RADIUS, 10 * constants.PARSEC, 4000)
+        self.assertAlmostEqual(self.planck_v(4000), st.get_mags()[2], places=9)
+        self.assertNotEqual(self.planck_v.get_cache_key(), key)
+        self.planck_v.distance = 20 * constants.PARSEC
+        st = Star(2 * constants.SOLAR_RADIUS, 20 * constants.PARSEC, 4000)
+        self.assertAlmostEqual(self.planck_v(4000), st.get_mags()[2], places=9)
+        self.planck_u.wave_band = "b"
+        self.assertEqual(self.planck_u(4000), self.planck_b(4000))
+        self.assertEqual(self.planck_u.get_cache_key(), self.planck_b.get_cache_key())
+        self.planck_r.band_system = "sdss"
+        planck_sdss_r = PlottedMagnitudeFunction(constants.SOLAR_RADIUS, 10 * constants.PARSEC, "r", "sdss")
+        self.assertEqual(self.planck_r.band_system, "sdss")
+        self.assertEqual(self.planck_r(4000), planck_sdss_r(4000))
+        # A wave band missing from the band system is rejected without changing the function.
+        self.assertRaises(ValueError, setattr, self.planck_b, "band_system", "2mass")
+        self.assertEqual(self.planck_b.get_cache_key(), self.planck_u.get_cache_key())
+
+    def test_set_parameters_of_unregistered_band_system(self):
+        # Shares a registered name, but not its wave bands.
+        system = band_systems.BandSystem("johnson_cousins", ["x"], [1e-6], [1e-9])
+        planck_x = PlottedMagnitudeFunction(constants.SOLAR_RADIUS, 10 * constants.PARSEC, "x", system)
+        mag = planck_x(4000)
+        planck_x.distance = 10 * constants.PARSEC
+        self.assertEqual(planck_x(4000), mag)
+        planck_x.radius = 2 * constants.SOLAR_RADIUS
+        self.assertAlmostEqual(planck_x(4000), system.magnitude(4000, 0, 2 * constants.SOLAR_RADIUS,
+                                                                10 * constants.PARSEC), places=9)
+        self.assertEqual(planck_x.band_system, "johnson_cousins")
+        self.assertNotEqual(planck_x.get_cache_key(), self.planck_v.get_cache_key())
+        # The registered system of the same name has no wave band x.
+        self.assertRaises(ValueError, setattr, planck_x, "band_system", "johnson_cousins")
+        self.assertAlmostEqual(planck_x(4000), system.magnitude(4000, 0, 2 * constants.SOLAR_RADIUS,
+                                                                10 * constants.PARSEC), places=9)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from mcgill_app.population import *
+import mcgill_app.constants as constants
+
+
+class StellarPopulationTester(unittest.TestCase):
+
+    def setUp(self):
+        self.population = StellarPopulation(2500, chunk_size=1000, seed=1)
+
+    def test_init(self):
+        self.assertRaises(ValueError, StellarPopulation, 10, imf_slope=1.0)
+        self.assertRaises(ValueError, StellarPopulation, 10, min_mass=2.0, max_mass=1.0)
+
+    def test_iter_chunks(self):
+        chunks = list(self.population.iter_chunks())
+        self.assertEqual([len(temps) for _, _, temps in chunks], [1000, 1000, 500])
+        for radii, distances, temps in chunks:
+            self.assertTrue(np.all(radii >= constants.SOLAR_RADIUS * 0.1 ** 0.8))
+            self.assertTrue(np.all((distances >= constants.PARSEC) & (distances <= 1000 * constants.PARSEC)))
+        # A star of one solar mass should be about as hot as the sun.
+        one_solar_mass = StellarPopulation(1, min_mass=1.0, max_mass=1.0 + 1e-9)
+        self.assertAlmostEqual(next(one_solar_mass.iter_chunks())[2][0], 5772, delta=10)
+
+    def test_seed(self):
+        chunks1 = list(StellarPopulation(100, seed=5).iter_chunks())
+        chunks2 = list(StellarPopulation(100, seed=5).iter_chunks())
+        self.assertTrue(np.array_equal(chunks1[0][2], chunks2[0][2]))
+
+    def test_colour_magnitude_histogram(self):
+        histogram = self.population.colour_magnitude_histogram(bins=(30, 40))
+        self.assertEqual(histogram.counts.shape, (40, 30))
+        self.assertEqual(histogram.counts.sum() + histogram.out_of_range, 2500)
+        repeat = StellarPopulation(2500, chunk_size=1000, seed=1).colour_magnitude_histogram(bins=(30, 40))
+        self.assertTrue(np.array_equal(histogram.counts, repeat.counts))
+
+
+class ColourMagnitudeHistogramTester(unittest.TestCase):
+
+    def setUp(self):
+        self.histogram = ColourMagnitudeHistogram((0.0, 2.0), (0.0, 10.0), (2, 5))
+
+    def test_add(self):
+        self.histogram.add(np.array([0.5, 1.5, 1.5, 3.0, np.nan]), np.array([1.0, 9.0, 9.5, 1.0, 1.0]))
+        expected = np.zeros((5, 2))
+        expected[0, 0] = 1
+        expected[4, 1] = 2
+        self.assertTrue(np.array_equal(self.histogram.counts, expected))
+        self.assertEqual(self.histogram.out_of_range, 2)
+
+    def test_get_bin_centres(self):
+        colours, mags = self.histogram.get_bin_centres()
+        self.assertEqual(list(colours), [0.5, 1.5])
+        self.assertEqual(list(mags), [1.0, 3.0, 5.0, 7.0, 9.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+from mcgill_app.uncertainty import *
+from mcgill_app.star import Star
+import mcgill_app.constants as constants
+
+
+class StreamingStatisticsTester(unittest.TestCase):
+
+    def setUp(self):
+        self.samples = np.random.RandomState(0).normal(loc=[1.0, 5.0], scale=[2.0, 0.5], size=(20000, 2))
+        self.statistics = StreamingStatistics([-15.0, 1.0], [17.0, 9.0], num_bins=800)
+
+    def test_add(self):
+        for chunk in np.split(self.samples, [3000, 10000, 15000]):
+            self.statistics.add(chunk)
+        self.assertEqual(list(self.statistics.counts), [20000, 20000])
+        self.assertTrue(np.allclose(self.statistics.means, self.samples.mean(axis=0)))
+        self.assertTrue(np.allclose(self.statistics.get_variances(), self.samples.var(axis=0, ddof=1)))
+
+    def test_nan_samples_ignored(self):
+        self.statistics.add(np.array([[1.0, np.nan], [3.0, 5.0], [np.nan, 7.0]]))
+        self.assertEqual(list(self.statistics.counts), [2, 2])
+        self.assertEqual(list(self.statistics.means), [2.0, 6.0])
+
+    def test_merge(self):
+        other = StreamingStatistics([-15.0, 1.0], [17.0, 9.0], num_bins=800)
+        self.statistics.add(self.samples[:5000])
+        other.add(self.samples[5000:])
+        self.statistics.merge(other)
+        self.assertTrue(np.allclose(self.statistics.means, self.samples.mean(axis=0)))
+        self.assertTrue(np.allclose(self.statistics.get_standard_deviations(), self.samples.std(axis=0, ddof=1)))
+        self.assertRaises(ValueError, self.statistics.merge, StreamingStatistics([0.0, 0.0], [1.0, 1.0], 800))
+
+    def test_get_quantile(self):
+        self.statistics.add(self.samples)
+        for q in [0.16, 0.5, 0.84]:
+            expected = np.percentile(self.samples, 100 * q, axis=0)
+            self.assertTrue(np.allclose(self.statistics.get_quantile(q), expected, atol=0.02))
+
+
+class PropagateMagnitudeUncertaintiesTester(unittest.TestCase):
+
+    def setUp(self):
+        self.temps = [4000.0, 6000.0]
+        self.radii = constants.SOLAR_RADIUS
+        self.distances = 10 * constants.PARSEC
+
+    def test_without_errors(self):
+        statistics = propagate_magnitude_uncertainties(self.temps, self.radii, self.distances, num_samples=10,
+                                                       chunk_size=4, seed=1)
+        self.assertEqual(statistics.shape, (2, 5))
+        expected = Star(self.radii, self.distances, 4000.0).get_mags()
+        self.assertTrue(np.allclose(statistics.means[0], expected))
+        self.assertTrue(np.allclose(statistics.get_standard_deviations(), 0.0))
+
+    def test_distance_error(self):
+        # Magnitudes change by 5 * log10(e) / d per unit distance, so small distance errors propagate linearly.
+        statistics = propagate_magnitude_uncertainties(self.temps, self.radii, self.distances,
+                                                       distance_errors=0.01 * self.distances, num_samples=20000,
+                                                       chunk_size=3000, seed=2)
+        self.assertTrue(np.allclose(statistics.get_standard_deviations(), 5 * np.log10(np.e) * 0.01, rtol=0.05))
+        self.assertTrue(np.allclose(statistics.get_quantile(0.5), statistics.means, atol=0.005))
+
+    def test_seed_and_processes(self):
+        kwargs = dict(temperature_errors=200.0, num_samples=3000, chunk_size=500, seed=3)
+        serial = propagate_magnitude_uncertainties(self.temps, self.radii, self.distances, **kwargs)
+        repeat = propagate_magnitude_uncertainties(self.temps, self.radii, self.distances, **kwargs)
+        parallel = propagate_magnitude_uncertainties(self.temps, self.radii, self.distances, processes=2, **kwargs)
+        self.assertTrue(np.array_equal(serial.means, repeat.means))
+        self.assertTrue(np.allclose(serial.means, parallel.means, rtol=1e-12))
+        self.assertTrue(np.array_equal(serial.histograms, parallel.histograms))
+
+    def test_invalid_sample_counts(self):
+        self.assertRaises(ValueError, propagate_magnitude_uncertainties, self.temps, self.radii, self.distances,
+                          num_samples=0)
+        self.assertRaises(ValueError, propagate_magnitude_uncertainties, self.temps, self.radii, self.distances,
+                          chunk_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()